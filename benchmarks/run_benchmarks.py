@@ -0,0 +1,146 @@
+"""
+Offline benchmarks for the fetch -> merge -> analyze -> report pipeline.
+
+Every stage is run on synthetic Lis-Skins and Skinport payloads of the
+requested sizes. Wall time is the best of `--repeat` plain runs and peak
+memory comes from one extra run under tracemalloc, so the tracing overhead
+does not distort the timings. Results are compared against a stored
+baseline and the script exits non-zero on a regression.
+
+    python -m benchmarks.run_benchmarks --sizes 25000 100000 1000000
+    python -m benchmarks.run_benchmarks --update-baseline
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from benchmarks.synthetic import lis_skins_bytes, skinport_payload
+from core.analyzer import analyze_market_opportunities, generate_html_report
+from markets.lis_skins.ls_stream import LisSkinsStreamParser, LisSkinsAggregator
+from markets.merge_markets import calculate_lis_skins_prices, prepare_skinport_data, merge_markets
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+CHUNK_SIZE = 65536
+# Differences below these are timer/allocator noise, whatever the relative change
+NOISE_FLOOR = {"seconds": 0.02, "peak_mb": 1.0}
+
+
+def stream_aggregate(raw):
+    """Streaming Lis-Skins parse, fed in network-sized chunks"""
+    aggregator = LisSkinsAggregator()
+    parser = LisSkinsStreamParser(aggregator.add)
+    for start in range(0, len(raw), CHUNK_SIZE):
+        parser.feed(raw[start:start + CHUNK_SIZE])
+    parser.close()
+    return aggregator.to_frame()
+
+
+def measure(func, args, repeat):
+    """Best wall time over `repeat` runs and peak traced memory of one run"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"seconds": round(min(timings), 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def run_pipeline(listings, items, repeat):
+    """Benchmark every pipeline stage for one payload size"""
+    raw = lis_skins_bytes(listings, items)
+    sp_items = skinport_payload(items)
+    stats = {}
+
+    ls_items, stats["parse_json"] = measure(json.loads, (raw,), repeat)
+    ls_prices, stats["calculate_lis_skins_prices"] = measure(calculate_lis_skins_prices, (ls_items,), repeat)
+    del ls_items
+    _, stats["stream_aggregate"] = measure(stream_aggregate, (raw,), repeat)
+    _, stats["prepare_skinport_data"] = measure(prepare_skinport_data, (sp_items,), repeat)
+    merged, stats["merge_markets"] = measure(merge_markets, (ls_prices, sp_items), repeat)
+    opportunities, stats["analyze_market_opportunities"] = measure(
+        analyze_market_opportunities, (merged,), repeat
+    )
+    _, stats["generate_html_report"] = measure(
+        lambda frame: generate_html_report(frame, force=True), (opportunities,), repeat
+    )
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """Return human readable regressions against the baseline"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if reference is None:
+                continue
+            for metric in ("seconds", "peak_mb"):
+                limit = max(reference[metric] * (1 + tolerance), reference[metric] + NOISE_FLOOR[metric])
+                if current[metric] > limit:
+                    regressions.append(
+                        f"{stage} @ {size} listings: {metric} {current[metric]:.3f} "
+                        f"vs baseline {reference[metric]:.3f}"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25000, 100000],
+                        help="Lis-Skins listing counts to benchmark")
+    parser.add_argument("--items", type=int, default=25000, help="Distinct item names")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    args = parser.parse_args(argv)
+    baseline_path = args.baseline.resolve()
+
+    results = {}
+    cwd = os.getcwd()
+    # Stages write history, logs and reports relative to the working directory
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                results[str(size)] = run_pipeline(size, min(args.items, size), args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'stage':<32}{'listings':>10}{'seconds':>10}{'peak MB':>10}")
+    for size, stages in results.items():
+        for stage, stat in stages.items():
+            print(f"{stage:<32}{size:>10}{stat['seconds']:>10.3f}{stat['peak_mb']:>10.1f}")
+
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
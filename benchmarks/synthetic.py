@@ -0,0 +1,105 @@
+import json
+import time
+import numpy as np
+
+WEAPONS = [
+    "AK-47", "M4A4", "M4A1-S", "AWP", "USP-S", "Glock-18", "Desert Eagle", "P250",
+    "Five-SeveN", "MAC-10", "MP9", "FAMAS", "Galil AR", "SSG 08", "UMP-45", "P90",
+]
+SKINS = [
+    "Redline", "Asiimov", "Vulcan", "Hyper Beast", "Neo-Noir", "Printstream", "Slate",
+    "Franklin", "Monkey Business", "Derailment", "Echoing Sands", "Bad Trip", "Oxide Blaze",
+    "Ruby Poison Dart", "Green Apple", "Fade", "Case Hardened", "Safari Mesh",
+]
+WEARS = ["Factory New", "Minimal Wear", "Field-Tested", "Well-Worn", "Battle-Scarred"]
+
+
+def item_names(count, seed=0):
+    """`count` distinct market hash names in the style of the real catalogue"""
+    names = []
+    for i in range(count):
+        weapon = WEAPONS[i % len(WEAPONS)]
+        skin = SKINS[(i // len(WEAPONS)) % len(SKINS)]
+        wear = WEARS[(i // (len(WEAPONS) * len(SKINS))) % len(WEARS)]
+        variant = i // (len(WEAPONS) * len(SKINS) * len(WEARS))
+        prefix = "StatTrak™ " if variant % 2 else ""
+        suffix = f" #{variant // 2}" if variant >= 2 else ""
+        names.append(f"{prefix}{weapon} | {skin}{suffix} ({wear})")
+    return names
+
+
+def base_prices(count, seed=0):
+    """Log-normally distributed reference prices, like real skin prices"""
+    rng = np.random.default_rng(seed)
+    return np.round(rng.lognormal(mean=0.5, sigma=1.4, size=count) + 0.03, 2)
+
+
+def lis_skins_payload(listings, items=25000, seed=0):
+    """
+    Synthetic Lis-Skins full export
+
+    Args:
+        listings (int): Number of listings in the export
+        items (int): Number of distinct item names
+
+    Returns:
+        dict: Same shape as the api_csgo_full.json response
+    """
+    rng = np.random.default_rng(seed)
+    names = item_names(items, seed)
+    prices = base_prices(items, seed)
+
+    # A few popular items hold most listings
+    weights = rng.zipf(1.6, size=items).astype(float)
+    owners = rng.choice(items, size=listings, p=weights / weights.sum())
+    listing_prices = np.round(prices[owners] * rng.uniform(0.85, 1.4, size=listings), 2)
+    floats = rng.uniform(0, 1, size=listings)
+
+    return {
+        "status": "success",
+        "last_update": int(time.time()),
+        "items": [
+            {
+                "id": i,
+                "name": names[owner],
+                "price": float(price),
+                "item_float": f"{item_float:.15f}",
+                "stickers": [],
+            }
+            for i, (owner, price, item_float) in enumerate(zip(owners, listing_prices, floats))
+        ],
+    }
+
+
+def lis_skins_bytes(listings, items=25000, seed=0):
+    """The synthetic Lis-Skins export encoded as it arrives over the wire"""
+    return json.dumps(lis_skins_payload(listings, items, seed), ensure_ascii=False).encode("utf-8")
+
+
+def skinport_payload(items=25000, seed=0):
+    """
+    Synthetic Skinport /v1/items response for the same item names
+
+    Returns:
+        list: One dict per item, same shape as the Skinport response
+    """
+    rng = np.random.default_rng(seed + 1)
+    names = item_names(items, seed)
+    prices = base_prices(items, seed)
+    suggested = np.round(prices * rng.uniform(0.9, 1.6, size=items), 2)
+    minimum = np.round(suggested * rng.uniform(0.8, 1.05, size=items), 2)
+    quantity = rng.integers(0, 400, size=items)
+
+    return [
+        {
+            "market_hash_name": name,
+            "currency": "EUR",
+            "suggested_price": float(s),
+            "min_price": float(m) if q else None,
+            "max_price": float(s * 3),
+            "mean_price": float(s),
+            "median_price": float(s),
+            "quantity": int(q),
+        }
+        for name, s, m, q in zip(names, suggested, minimum, quantity)
+    ]
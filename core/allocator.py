@@ -0,0 +1,101 @@
+import numpy as np
+
+
+def allocate_units(unit_item, unit_price, unit_profit, total_budget, max_items):
+    """
+    Greedy-with-bound budget allocation over whole item units
+
+    Every unit is a knapsack entry with its price as weight and its net
+    profit as value; units without a positive profit are never bought.
+    Units are taken in order of profit per euro, skipping the ones that no
+    longer fit, while at most `max_items` distinct items may be bought.
+    Units of one item must be ordered cheapest first, so an item is always
+    bought as a prefix of its units. The greedy can stop early on a few
+    high-ratio units, so the most profitable affordable prefix of any single
+    item is also tried, and bought alone if it beats the greedy pick. This
+    is a heuristic: with the item count limit there is no constant-factor
+    guarantee.
+
+    The greedy runs in vectorized rounds: each round takes the longest run
+    of units that fits the remaining budget and item count, then drops the
+    units that can no longer be bought, so only a few rounds are needed
+    even for 100k+ units.
+
+    Args:
+        unit_item (np.ndarray): Candidate index (>= 0) of each unit; lower
+            indices win ties in profit per euro
+        unit_price (np.ndarray): Price of each unit
+        unit_profit (np.ndarray): Net profit of each unit
+        total_budget (float): Spending limit over all items
+        max_items (int): Distinct items that may be bought
+
+    Returns:
+        tuple: (boolean mask of taken units, fractional-knapsack upper bound
+            on the achievable profit, ignoring the item count limit)
+    """
+    unit_item = np.asarray(unit_item, dtype=np.int64)
+    taken = np.zeros(len(unit_price), dtype=bool)
+    if not len(unit_price) or max_items <= 0 or total_budget <= 0:
+        return taken, 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = unit_profit / unit_price
+    order = np.lexsort((unit_item, -ratio))
+    order = order[unit_profit[order] > 0]
+    if not len(order):
+        return taken, 0.0
+    prices = unit_price[order]
+    items = unit_item[order]
+
+    # Upper bound: the fractional greedy over all units
+    spent = np.cumsum(prices)
+    full = np.searchsorted(spent, total_budget, side='right')
+    bound = unit_profit[order[:full]].sum()
+    if full < len(order):
+        leftover = total_budget - (spent[full - 1] if full else 0.0)
+        bound += unit_profit[order[full]] * leftover / prices[full]
+
+    chosen = np.zeros(items.max() + 1, dtype=bool)
+    n_chosen = 0
+    remaining = float(total_budget)
+    pending = np.arange(len(order))
+    while len(pending):
+        pending = pending[prices[pending] <= remaining]
+        if n_chosen >= max_items:
+            pending = pending[chosen[items[pending]]]
+        if not len(pending):
+            break
+
+        # Longest run that fits the budget, cut before the first item over the count limit
+        spent = np.cumsum(prices[pending])
+        fits = np.searchsorted(spent, remaining, side='right')
+        new_item = np.zeros(len(pending), dtype=bool)
+        first = np.unique(items[pending], return_index=True)[1]
+        new_item[first[~chosen[items[pending[first]]]]] = True
+        within_count = np.searchsorted(np.cumsum(new_item), max_items - n_chosen, side='right')
+        take = min(fits, within_count)
+
+        bought = pending[:take]
+        taken[order[bought]] = True
+        chosen[items[bought]] = True
+        n_chosen += int(new_item[:take].sum())
+        remaining -= spent[take - 1] if take else 0.0
+        pending = pending[take:]
+
+    # Best affordable prefix of a single item, bought alone when it beats the greedy pick
+    by_item = np.argsort(unit_item, kind='stable')
+    item_sorted = unit_item[by_item]
+    starts = np.flatnonzero(np.r_[True, item_sorted[1:] != item_sorted[:-1]])
+    lengths = np.diff(np.r_[starts, len(by_item)])
+    cost = np.cumsum(unit_price[by_item])
+    profit = np.cumsum(unit_profit[by_item])
+    first = np.repeat(starts, lengths)
+    cost -= np.repeat(np.r_[0.0, cost[starts[1:] - 1]], lengths)
+    profit -= np.repeat(np.r_[0.0, profit[starts[1:] - 1]], lengths)
+    prefix_profit = np.where(cost <= total_budget, profit, -np.inf)
+    best = int(np.argmax(prefix_profit))
+    if prefix_profit[best] > unit_profit[taken].sum():
+        taken = np.zeros(len(unit_price), dtype=bool)
+        taken[by_item[first[best]:best + 1]] = True
+
+    return taken, float(bound)
@@ -1,153 +1,432 @@
+import hashlib
+import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import jinja2
 from utils.helpers import load_config
 from utils.logger import setup_logger
+from utils.metrics import timed, record_rows
+from core.allocator import allocate_units
+from core.arbitrage import MARKETS, find_routes
+from markets.item_catalogue import get_item_catalogue
 
-def analyze_market_opportunities(merged_df):
+def analyze_market_opportunities(merged_df, config=None, depths=None):
     """
     Analyze market opportunities based on the strategy config
     Returns filtered DataFrame with profitable items
     
-    Now accounts for Skinport commission rate when calculating profits
+    Profits are net of the commission of the market each item is sold on.
+    `config` overrides config.yaml, e.g. with the engine's validated copy.
+    `depths` maps market names to their `PriceDepth` for unit sizing.
     """
-    config = load_config()
-    strategy = config['strategy']
-    risk = config['risk']
-    commission_rate = config['skinport']['commission_rate']  # Get commission rate from config
+    config = config or load_config()
+    parameter_set = {'strategy': config['strategy'], 'risk': config['risk']}
+    return analyze_market_opportunities_batch(merged_df, [parameter_set], config=config, depths=depths)[0]
+
+@timed("analyze")
+def analyze_market_opportunities_batch(merged_df, parameter_sets, commission_rates=None, config=None,
+                                       depths=None):
+    """
+    Evaluate many strategy/risk parameter sets over one merged frame
     
+    The best buy/sell market pair of every item and its profit metrics are
+    computed once, and the filters of all parameter sets are evaluated
+    together as one (parameter sets x items) boolean matrix. The merged
+    frame is not modified; only the selected rows are copied into each
+    result.
+    
+    Args:
+        merged_df (pd.DataFrame): Output of `merge_markets`
+        parameter_sets (list): Dicts with optional 'strategy' and 'risk'
+            blocks shaped like config.yaml; missing values come from config
+        commission_rates (dict): Market name -> commission overriding config
+        config (dict): Config to use instead of config.yaml
+        depths (dict): Market name -> `PriceDepth`; opportunities bought on
+            those markets are sized against their listings (see `_depth_sizing`)
+        
+    Returns:
+        list[pd.DataFrame]: Opportunities for each parameter set, in order
+    """
+    config = config or load_config()
     logger = setup_logger("market_analyzer")
     
     try:
-        # Calculate NET sell price after commission
-        merged_df['sp_net_price'] = merged_df['sp_suggested_price'] * (1 - commission_rate)
+        strategies = [{**config['strategy'], **p.get('strategy', {})} for p in parameter_sets]
+        risks = [{**config['risk'], **p.get('risk', {})} for p in parameter_sets]
         
-        # Calculate potential profit metrics (now using net price)
-        merged_df['potential_profit'] = merged_df['sp_net_price'] - merged_df['ls_min_price']
-        merged_df['profit_pct'] = ((merged_df['sp_net_price'] - merged_df['ls_min_price']) / 
-                                 merged_df['ls_min_price']) * 100
+        def column(values):
+            return np.array(values, dtype=float)[:, None]
         
-        # Apply filters based on config
-        filtered = merged_df[
-            (merged_df['profit_pct'] >= strategy['min_profit_pct']) &
-            (merged_df['profit_pct'] <= strategy['max_profit_pct']) &
-            (merged_df['ls_quantity'] >= strategy['min_quantity']) &
-            (merged_df['ls_min_price'] <= risk['max_investment_per_item'])
-        ].copy()
+        min_profit_pct = column([s['min_profit_pct'] for s in strategies])
+        max_profit_pct = column([s['max_profit_pct'] for s in strategies])
+        min_quantity = column([s['min_quantity'] for s in strategies])
+        max_investment_per_item = column([r['max_investment_per_item'] for r in risks])
         
-        # Add commission-adjusted columns for reporting
-        filtered['commission'] = filtered['sp_suggested_price'] * commission_rate
-        filtered['gross_profit'] = filtered['sp_suggested_price'] - filtered['ls_min_price']
-        filtered['net_profit'] = filtered['potential_profit']
+        # Best route per item and its NET profit after commission, once for all sets
+        routes = find_routes(merged_df, config, commission_rates)
+        buy_price = routes['buy_price']
+        quantity = routes['quantity']
+        potential_profit = routes['net_sell_price'] - buy_price
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profit_pct = potential_profit / buy_price * 100
         
-        # Calculate investment metrics
-        filtered['investment'] = filtered['ls_min_price']
-        filtered = filtered.sort_values('profit_pct', ascending=False)
+        # Apply filters of every parameter set in a single broadcast pass
+        passed = (
+            (profit_pct >= min_profit_pct) &
+            (profit_pct <= max_profit_pct) &
+            (quantity >= min_quantity) &
+            (buy_price <= max_investment_per_item)
+        )
         
-        # Apply risk limits
-        filtered = filtered.head(risk['max_items_per_day'])
-        total_investment = filtered['investment'].sum()
+        # Items ranked by profit once; each set keeps its passing items in that order
+        ranking = np.argsort(-np.nan_to_num(profit_pct, nan=-np.inf), kind='stable')
+        passed_ranked = passed[:, ranking]
         
-        if total_investment > risk['max_total_investment']:
-            # Scale down to stay within budget
-            filtered = filtered.assign(
-                investment=lambda x: x['investment'] * risk['max_total_investment'] / total_investment
+        results = []
+        for i, (strategy, risk) in enumerate(zip(strategies, risks)):
+            rows = ranking[passed_ranked[i]]
+            selected = {key: values[rows] for key, values in routes.items()}
+            filtered = _build_opportunities(
+                merged_df, rows, selected, potential_profit[rows], profit_pct[rows], strategy, risk, depths
             )
+            results.append(filtered)
+            record_rows("analyze", len(filtered))
         
         logger.info(
-            f"Found {len(filtered)} profitable opportunities "
-            f"(after {commission_rate*100:.1f}% commission)"
+            f"Found {', '.join(str(len(r)) for r in results)} profitable opportunities "
+            f"for {len(results)} parameter set(s) (net of commission)"
         )
-        return filtered
+        return results
         
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
         raise
 
-def generate_html_report(opportunities_df, output_path=None):
+def _build_opportunities(merged_df, rows, routes, potential_profit, profit_pct, strategy, risk, depths=None):
     """
-    Generate an HTML report from the opportunities DataFrame
+    Allocate the budget over ranked candidate rows and copy the bought ones
+    
+    Args:
+        rows (np.ndarray): Passing rows of `merged_df`, best profit_pct first
+        routes (dict): `find_routes` arrays for those rows
+        potential_profit, profit_pct (np.ndarray): Per-unit net profit of the rows
+        depths (dict): Market name -> `PriceDepth` for unit sizing
     """
-    config = load_config()
+    sizing = None
+    if depths:
+        sizing = _depth_sizing(merged_df['item_id'].to_numpy()[rows], routes, depths, strategy, risk)
+    units, investment, expected_profit = _allocate(routes, sizing, risk)
     
-    if output_path is None:
-        output_path = Path(config['html_reports']['path']) / f"market_opportunities.html"
+    keep = np.flatnonzero(units > 0)
+    filtered = _opportunity_frame(
+        merged_df, rows[keep], {key: values[keep] for key, values in routes.items()},
+        potential_profit[keep], profit_pct[keep]
+    )
+    if sizing is not None:
+        for column in DEPTH_COLUMNS:
+            filtered[column] = sizing[column][keep]
+    filtered['units'] = units[keep]
+    filtered['investment'] = investment[keep]
+    filtered['expected_profit'] = expected_profit[keep]
+    return filtered
+
+def _opportunity_frame(merged_df, rows, routes, potential_profit, profit_pct):
+    """Copy the selected rows of `merged_df` and add the route and profit columns"""
+    filtered = merged_df.iloc[rows].copy()
+    filtered['buy_market'] = routes['buy_market']
+    filtered['sell_market'] = routes['sell_market']
+    filtered['buy_price'] = routes['buy_price']
+    filtered['sell_price'] = routes['sell_price']
+    filtered['buy_quantity'] = routes['quantity']
+    filtered['net_sell_price'] = routes['net_sell_price']
+    filtered['potential_profit'] = potential_profit
+    filtered['profit_pct'] = profit_pct
     
-    # Prepare data for display
-    report_df = opportunities_df[[
-        'name', 'ls_min_price', 'sp_suggested_price', 
-        'potential_profit', 'profit_pct', 'ls_quantity',
-        'investment'
-    ]].copy()
-    
-    report_df.columns = [
-        'Item Name', 'Buy Price (LS)', 'Sell Price (SP)', 
-        'Potential Profit', 'Profit %', 'Available Qty',
-        'Recommended Investment'
-    ]
+    # Add commission-adjusted columns for reporting
+    filtered['commission'] = routes['sell_price'] * routes['commission_rate']
+    filtered['gross_profit'] = routes['sell_price'] - routes['buy_price']
+    filtered['net_profit'] = potential_profit
+    return filtered
+
+DEPTH_COLUMNS = ['depth_units', 'depth_cost', 'depth_profit', 'marginal_profit']
+
+def _depth_sizing(item_ids, routes, depths, strategy, risk):
+    """
+    Size candidates against the listings actually on sale
     
-    # Format numbers
-    for col in ['Buy Price (LS)', 'Sell Price (SP)', 'Potential Profit', 'Recommended Investment']:
-        report_df[col] = report_df[col].apply(lambda x: f"€{x:.2f}")
-    
-    report_df['Profit %'] = report_df['Profit %'].apply(lambda x: f"{x:.1f}%")
-    
-    # Create HTML template
-    template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Market Opportunities Report</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 20px; }
-            h1 { color: #333; }
-            table { border-collapse: collapse; width: 100%; }
-            th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
-            th { background-color: #f2f2f2; }
-            tr:nth-child(even) { background-color: #f9f9f9; }
-            .positive { color: green; }
-            .negative { color: red; }
-        </style>
-    </head>
-    <body>
-        <h1>Market Opportunities Report</h1>
-        <p>Generated on {{ timestamp }}</p>
+    Units are bought cheapest first while each unit still makes at least
+    `min_profit_pct` after commission and the item stays within
+    `max_investment_per_item`. Returns arrays for the DEPTH_COLUMNS:
+    depth_units, depth_cost, depth_profit (net profit of all those units)
+    and marginal_profit (net profit of the last unit), NaN for items bought
+    on a market without depth data, plus 'unit_rows' and 'unit_prices'
+    listing every sized unit for the allocator.
+    """
+    n = len(item_ids)
+    units, cost, last_price = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    net_sell = routes['net_sell_price']
+    unit_rows, unit_prices = [np.empty(0, dtype=np.int64)], [np.empty(0)]
+    for market, depth in depths.items():
+        rows = np.flatnonzero(routes['buy_market'] == market)
+        if depth is None or not len(rows):
+            continue
+        runs = depth.runs_for(item_ids[rows], get_item_catalogue())
+        max_price = net_sell[rows] / (1 + strategy['min_profit_pct'] / 100)
+        budget = np.full(len(rows), float(risk['max_investment_per_item']))
+        units[rows], cost[rows], last_price[rows] = depth.fill(runs, max_price, budget)
+        segment, prices = depth.unit_prices(runs, units[rows])
+        unit_rows.append(rows[segment])
+        unit_prices.append(prices)
+    
+    return {
+        'depth_units': units,
+        'depth_cost': cost,
+        'depth_profit': units * net_sell - cost,
+        'marginal_profit': net_sell - last_price,
+        'unit_rows': np.concatenate(unit_rows),
+        'unit_prices': np.concatenate(unit_prices),
+    }
+
+def _allocate(routes, sizing, risk):
+    """
+    Whole units to buy per candidate under the risk limits
+    
+    Candidates with depth sizing offer every sized unit at its own listing
+    price; the rest offer one unit at their buy price. `allocate_units`
+    then picks units by profit per euro within `max_total_investment` and
+    `max_items_per_day`, with ties going to the better ranked candidate.
+    
+    Returns:
+        tuple: (units, investment, expected net profit) per candidate
+    """
+    n = len(routes['buy_price'])
+    single = np.ones(n, dtype=bool)
+    unit_rows, unit_prices = [], []
+    if sizing is not None:
+        single = np.isnan(sizing['depth_units'])
+        unit_rows.append(sizing['unit_rows'])
+        unit_prices.append(sizing['unit_prices'])
+    single_rows = np.flatnonzero(single)
+    unit_rows.append(single_rows)
+    unit_prices.append(routes['buy_price'][single_rows])
+    unit_rows, unit_prices = np.concatenate(unit_rows), np.concatenate(unit_prices)
+    unit_profit = routes['net_sell_price'][unit_rows] - unit_prices
+    
+    taken, bound = allocate_units(
+        unit_rows, unit_prices, unit_profit, risk['max_total_investment'], risk['max_items_per_day']
+    )
+    bought = unit_rows[taken]
+    units = np.bincount(bought, minlength=n)
+    investment = np.bincount(bought, weights=unit_prices[taken], minlength=n)
+    expected_profit = np.bincount(bought, weights=unit_profit[taken], minlength=n)
+    setup_logger("market_analyzer").debug(
+        f"Allocated €{investment.sum():.2f} over {int((units > 0).sum())} items for "
+        f"€{expected_profit.sum():.2f} expected profit (upper bound €{bound:.2f})"
+    )
+    return units, investment, expected_profit
+
+class OpportunityTracker:
+    """
+    Analyzer state per item ID, updated only for items whose prices changed.
+    
+    Best routes, profit metrics and the strategy filters of every item are
+    kept in arrays indexed by item ID. Each `update` recomputes them just
+    for the items a `MergeState` reports as changed (or for all items after
+    a strategy/risk/commission change), then ranks the passing items as
+    `analyze_market_opportunities` does. The difference to the previous
+    opportunity set is returned as a change log.
+    """
+    
+    def __init__(self):
+        self._params = None
+        self.routes = {}  # Route field -> array indexed by item ID
+        self.potential_profit = np.empty(0)
+        self.profit_pct = np.empty(0)
+        self.passed = np.zeros(0, dtype=bool)
+        self._current = (np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0))
+    
+    def _grow(self, size):
+        extra = size - len(self.passed)
+        if extra > 0:
+            for key, values in self.routes.items():
+                fill = None if values.dtype == object else np.nan
+                self.routes[key] = np.concatenate([values, np.full(extra, fill, dtype=values.dtype)])
+            self.potential_profit = np.concatenate([self.potential_profit, np.full(extra, np.nan)])
+            self.profit_pct = np.concatenate([self.profit_pct, np.full(extra, np.nan)])
+            self.passed = np.concatenate([self.passed, np.zeros(extra, dtype=bool)])
+    
+    def update(self, merged_df, changed_ids, config=None, depths=None):
+        """
+        Bring the opportunity set up to date with a merged frame
         
-        <h2>Strategy Parameters</h2>
-        <ul>
-            <li>Minimum Profit: {{ strategy.min_profit_pct }}%</li>
-            <li>Maximum Profit: {{ strategy.max_profit_pct }}%</li>
-            <li>Minimum Quantity: {{ strategy.min_quantity }}</li>
-        </ul>
+        Args:
+            merged_df (pd.DataFrame): Output of `merge_markets`, with item_id
+            changed_ids (np.ndarray): Item IDs changed since the last update,
+                from `MergeState.take_changes`
+            config (dict): Config with strategy, risk and market sections
+                (default config.yaml)
+            depths (dict): Market name -> `PriceDepth` for unit sizing
         
-        <h2>Risk Management</h2>
-        <ul>
-            <li>Max Investment Per Item: €{{ risk.max_investment_per_item }}</li>
-            <li>Max Total Investment: €{{ risk.max_total_investment }}</li>
-            <li>Max Items Per Day: {{ risk.max_items_per_day }}</li>
-        </ul>
+        Returns:
+            tuple: (opportunities DataFrame like `analyze_market_opportunities`,
+                change log DataFrame with item_id, name, change ('enter' or
+                'leave') and profit_pct)
+        """
+        config = config or load_config()
+        strategy, risk = config['strategy'], config['risk']
+        logger = setup_logger("market_analyzer")
         
-        <h2>Recommended Opportunities ({{ count }})</h2>
-        {{ table_html }}
+        with timed("analyze"):
+            item_ids = merged_df['item_id'].to_numpy()
+            self._grow(item_ids.max() + 1 if len(item_ids) else 0)
+            
+            # New strategy or commission: every item has to be filtered again
+            params = (strategy, risk, [m.commission_rate(config) for m in MARKETS])
+            if params != self._params:
+                self._params = params
+                rows = np.arange(len(item_ids))
+            else:
+                changed = np.zeros(len(self.passed), dtype=bool)
+                changed[changed_ids[changed_ids < len(changed)]] = True
+                rows = np.flatnonzero(changed[item_ids])
+            
+            ids = item_ids[rows]
+            routes = find_routes(merged_df, config, rows=rows)
+            for key, values in routes.items():
+                if key not in self.routes:
+                    fill = None if values.dtype == object else np.nan
+                    self.routes[key] = np.full(len(self.passed), fill, dtype=values.dtype)
+                self.routes[key][ids] = values
+            
+            buy_price = routes['buy_price']
+            self.potential_profit[ids] = routes['net_sell_price'] - buy_price
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.profit_pct[ids] = self.potential_profit[ids] / buy_price * 100
+            pct = self.profit_pct[ids]
+            self.passed[ids] = (
+                (pct >= strategy['min_profit_pct']) &
+                (pct <= strategy['max_profit_pct']) &
+                (routes['quantity'] >= strategy['min_quantity']) &
+                (buy_price <= risk['max_investment_per_item'])
+            )
+            
+            # Only passing items are ranked; same order as the full analysis
+            candidates = np.flatnonzero(self.passed[item_ids])
+            order = np.argsort(-self.profit_pct[item_ids[candidates]], kind='stable')
+            selected = candidates[order]
+            selected_ids = item_ids[selected]
+            
+            opportunities = _build_opportunities(
+                merged_df, selected, {key: values[selected_ids] for key, values in self.routes.items()},
+                self.potential_profit[selected_ids], self.profit_pct[selected_ids], strategy, risk, depths
+            )
+            changes = self._diff(opportunities)
         
-        <h3>Summary</h3>
-        <ul>
-            <li>Total Potential Profit: €{{ total_profit | round(2) }}</li>
-            <li>Total Investment: €{{ total_investment | round(2) }}</li>
-            <li>ROI: {{ roi | round(1) }}%</li>
-        </ul>
-    </body>
-    </html>
+        record_rows("analyze", len(opportunities))
+        logger.info(
+            f"Found {len(opportunities)} profitable opportunities "
+            f"({len(rows)} items re-evaluated, {(changes['change'] == 'enter').sum()} entered, "
+            f"{(changes['change'] == 'leave').sum()} left)"
+        )
+        return opportunities, changes
+    
+    def _diff(self, opportunities):
+        ids = opportunities['item_id'].to_numpy()
+        names = opportunities['name'].to_numpy()
+        pct = opportunities['profit_pct'].to_numpy()
+        previous_ids, previous_names, previous_pct = self._current
+        entered = ~np.isin(ids, previous_ids)
+        left = ~np.isin(previous_ids, ids)
+        self._current = (ids, names, pct)
+        return pd.DataFrame({
+            'item_id': np.concatenate([ids[entered], previous_ids[left]]),
+            'name': np.concatenate([names[entered], previous_names[left]]),
+            'change': ['enter'] * int(entered.sum()) + ['leave'] * int(left.sum()),
+            'profit_pct': np.concatenate([pct[entered], previous_pct[left]]),
+        })
+
+# Report templates are compiled once per process by the shared environment
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+_report_env = None
+_report_fingerprints = {}  # Output path -> fingerprint of the report last written there
+
+def _report_template(name="market_opportunities.html"):
+    global _report_env
+    if _report_env is None:
+        _report_env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_DIR))
+    return _report_env.get_template(name)
+
+def _report_fingerprint(report_df, config):
+    """Hash of the report rows and the strategy/risk settings shown with them"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(report_df, index=False).to_numpy().tobytes())
+    digest.update(repr((list(report_df.columns), config['strategy'], config['risk'])).encode())
+    return digest.hexdigest()
+
+def _format_column(values, pattern):
+    """printf-style formatting of a whole numeric column at once"""
+    return np.char.mod(pattern, np.asarray(values, dtype=float))
+
+@timed("report")
+def generate_html_report(opportunities_df, output_path=None, config=None, force=False):
+    """
+    Generate an HTML report from the opportunities DataFrame
+    
+    The report is written to a temporary file and renamed over the old one,
+    so a browser refreshing it never sees a half-written page. Nothing is
+    written when the opportunities and settings are the same as in the last
+    report at `output_path`, unless `force` is set; data age alone does
+    not count as a change.
+    
+    Returns:
+        Path: The written report, or None when it was unchanged and skipped
     """
+    config = config or load_config()
+    
+    if output_path is None:
+        output_path = Path(config['html_reports']['path']) / f"market_opportunities.html"
+    output_path = Path(output_path)
+    
+    # Prepare data for display
+    report_columns = {
+        'name': 'Item Name',
+        'buy_market': 'Buy On',
+        'buy_price': 'Buy Price',
+        'sell_market': 'Sell On',
+        'sell_price': 'Sell Price',
+        'potential_profit': 'Potential Profit',
+        'profit_pct': 'Profit %',
+        'buy_quantity': 'Available Qty',
+        'units': 'Units',
+        'investment': 'Recommended Investment',
+    }
+    fingerprint = _report_fingerprint(opportunities_df[list(report_columns)], config)
+    if not force and _report_fingerprints.get(output_path) == fingerprint and output_path.exists():
+        return None
+    
+    if 'data_age_s' in opportunities_df.columns:
+        report_columns['data_age_s'] = 'Data Age'
+    
+    report_df = opportunities_df[list(report_columns)].rename(columns=report_columns)
+    
+    # Format numbers
+    for col in ['Buy Price', 'Sell Price', 'Potential Profit', 'Recommended Investment']:
+        report_df[col] = _format_column(report_df[col], "€%.2f")
+    
+    report_df['Profit %'] = _format_column(report_df['Profit %'], "%.1f%%")
+    
+    if 'Data Age' in report_df.columns:
+        report_df['Data Age'] = _format_column(report_df['Data Age'], "%.0fs")
     
     # Calculate summary metrics
-    total_profit = opportunities_df['potential_profit'].sum()
+    total_profit = opportunities_df['expected_profit'].sum()
     total_investment = opportunities_df['investment'].sum()
     roi = (total_profit / total_investment) * 100 if total_investment > 0 else 0
     
     # Render HTML
-    html = jinja2.Template(template).render(
+    html = _report_template().render(
         timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         strategy=config['strategy'],
         risk=config['risk'],
@@ -158,10 +437,12 @@ def generate_html_report(opportunities_df, output_path=None):
         roi=roi
     )
     
-    # Save to file
+    # Save to file atomically
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         f.write(html)
+    os.replace(tmp_path, output_path)
+    _report_fingerprints[output_path] = fingerprint
     
     return output_path
-
@@ -0,0 +1,141 @@
+import numpy as np
+from utils.helpers import load_config
+
+
+class MarketAdapter:
+    """
+    How one marketplace appears in the merged frame.
+
+    Args:
+        name (str): Market name shown in reports
+        config_section (str): config.yaml section holding its `commission_rate`
+        buy_column (str): Column with the price items can be bought at, or
+            None if the market is not bought from
+        sell_column (str): Column with the price items can be sold at, or
+            None if the market is not sold to
+        quantity_column (str): Column with the units available to buy
+    """
+
+    def __init__(self, name, config_section, buy_column=None, sell_column=None, quantity_column=None):
+        self.name = name
+        self.config_section = config_section
+        self.buy_column = buy_column
+        self.sell_column = sell_column
+        self.quantity_column = quantity_column
+
+    def commission_rate(self, config):
+        """Seller fee taken by the market on a sale"""
+        return config.get(self.config_section, {}).get('commission_rate', 0.0)
+
+
+# Every market merged by merge_markets; a new marketplace only needs its columns here
+MARKETS = [
+    MarketAdapter("LisSkins", "lis_skins", buy_column="ls_min_price", quantity_column="ls_quantity"),
+    MarketAdapter("Skinport", "skinport", buy_column="sp_min_price",
+                  sell_column="sp_suggested_price", quantity_column="sp_quantity"),
+]
+
+
+def _column(merged_df, column, rows):
+    if column is None or column not in merged_df.columns:
+        return np.full(len(merged_df) if rows is None else len(rows), np.nan)
+    values = merged_df[column].to_numpy(dtype=float)
+    return values if rows is None else values[rows]
+
+
+def price_matrix(merged_df, markets, commission_rates, rows=None):
+    """
+    Item x market price matrices
+
+    Args:
+        merged_df (pd.DataFrame): Output of `merge_markets`
+        markets (list[MarketAdapter]): Markets, one matrix column each
+        commission_rates (list[float]): Seller fee of each market
+        rows (np.ndarray): Only build these rows (default all)
+
+    Returns:
+        tuple: (buy prices, gross sell prices, net sell prices, buy
+            quantities), each of shape (items, markets) and NaN where a
+            market does not trade
+    """
+    buy = np.column_stack([_column(merged_df, m.buy_column, rows) for m in markets])
+    sell = np.column_stack([_column(merged_df, m.sell_column, rows) for m in markets])
+    quantity = np.column_stack([_column(merged_df, m.quantity_column, rows) for m in markets])
+    net_sell = sell * (1 - np.asarray(commission_rates, dtype=float))
+    return buy, sell, net_sell, quantity
+
+
+def best_routes(buy, net_sell):
+    """
+    Most profitable (buy market, sell market) pair per item
+
+    Only the two cheapest buy and two best sell markets of each item are
+    considered, so the cost is linear in the number of markets. When the
+    best buy and sell market coincide, the better of the two runner-up
+    pairs is taken instead.
+
+    Returns:
+        tuple: (buy market index, sell market index) per item
+    """
+    n, markets = buy.shape
+    rows = np.arange(n)
+    if markets < 2:
+        return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+
+    buy_cost = np.where(np.isnan(buy), np.inf, buy)
+    sell_value = np.where(np.isnan(net_sell), -np.inf, net_sell)
+    buy_top = np.argsort(buy_cost, axis=1, kind='stable')[:, :2]
+    sell_top = np.argsort(-sell_value, axis=1, kind='stable')[:, :2]
+
+    buy_idx, sell_idx = buy_top[:, 0].copy(), sell_top[:, 0].copy()
+    same = buy_idx == sell_idx
+    with np.errstate(invalid='ignore'):
+        change_buy = sell_value[rows, sell_top[:, 0]] - buy_cost[rows, buy_top[:, 1]]
+        change_sell = sell_value[rows, sell_top[:, 1]] - buy_cost[rows, buy_top[:, 0]]
+        use_second_buy = same & (change_buy >= change_sell)
+    use_second_sell = same & ~use_second_buy
+    buy_idx[use_second_buy] = buy_top[use_second_buy, 1]
+    sell_idx[use_second_sell] = sell_top[use_second_sell, 1]
+    return buy_idx, sell_idx
+
+
+def find_routes(merged_df, config=None, commission_rates=None, markets=None, rows=None):
+    """
+    Best cross-market trade for every item
+
+    Args:
+        merged_df (pd.DataFrame): Output of `merge_markets`
+        config (dict): Config for the markets' commissions (default config.yaml)
+        commission_rates (dict): Market name -> commission overriding config
+        markets (list[MarketAdapter]): Markets to trade (default MARKETS)
+        rows (np.ndarray): Only evaluate these rows (default all)
+
+    Returns:
+        dict: Arrays per item: buy_market and sell_market (names, None when
+            the item has no route), buy_price, sell_price, net_sell_price,
+            commission_rate and quantity (units available at buy_price).
+            Prices are NaN when either side of the route is missing.
+    """
+    config = config or load_config()
+    markets = markets or MARKETS
+    overrides = commission_rates or {}
+    rates = [overrides.get(m.name, m.commission_rate(config)) for m in markets]
+
+    buy, sell, net_sell, quantity = price_matrix(merged_df, markets, rates, rows)
+    buy_idx, sell_idx = best_routes(buy, net_sell)
+    items = np.arange(len(buy))
+
+    buy_price = buy[items, buy_idx]
+    net_sell_price = net_sell[items, sell_idx]
+    has_route = ~np.isnan(buy_price) & ~np.isnan(net_sell_price) & (buy_idx != sell_idx)
+    names = np.array([m.name for m in markets], dtype=object)
+
+    return {
+        'buy_market': np.where(has_route, names[buy_idx], None),
+        'sell_market': np.where(has_route, names[sell_idx], None),
+        'buy_price': np.where(has_route, buy_price, np.nan),
+        'sell_price': np.where(has_route, sell[items, sell_idx], np.nan),
+        'net_sell_price': np.where(has_route, net_sell_price, np.nan),
+        'commission_rate': np.asarray(rates, dtype=float)[sell_idx],
+        'quantity': np.where(has_route, quantity[items, buy_idx], np.nan),
+    }
@@ -0,0 +1,238 @@
+import heapq
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from core.analyzer import analyze_market_opportunities_batch
+from core.journal_store import TIME_FORMAT, get_journal_store
+from markets.price_history import get_price_history
+from utils.helpers import load_config
+from utils.logger import setup_logger
+
+# Only these history columns are ever read by the backtest; without Skinport's
+# own buy prices every simulated trade is a Lis-Skins -> Skinport route
+BACKTEST_COLUMNS = ["snapshot_time", "name", "ls_min_price", "ls_quantity", "sp_suggested_price"]
+
+
+def _evaluate_day(day_folder, parameter_sets, commission_rate):
+    """
+    Worker: run the analyzer over every snapshot of one history partition
+
+    Returns:
+        pd.DataFrame: One row per pick (snapshot_time, strategy, name,
+            buy_price, units), or None if nothing was picked
+    """
+    # One log line per snapshot and strategy would drown the backtest output
+    setup_logger("market_analyzer").setLevel(logging.WARNING)
+
+    frame = pq.read_table(day_folder, columns=BACKTEST_COLUMNS).to_pandas()
+    picks = []
+    for snapshot_time, snapshot in frame.groupby("snapshot_time", sort=True):
+        snapshot = snapshot.reset_index(drop=True)
+        results = analyze_market_opportunities_batch(snapshot, parameter_sets, {"Skinport": commission_rate})
+        for strategy, opportunities in enumerate(results):
+            if opportunities.empty:
+                continue
+            picks.append(pd.DataFrame({
+                "snapshot_time": snapshot_time,
+                "strategy": strategy,
+                "name": opportunities["name"].to_numpy(),
+                "buy_price": opportunities["buy_price"].to_numpy(),
+                "units": opportunities["units"].to_numpy(),
+            }))
+    return pd.concat(picks, ignore_index=True) if picks else None
+
+
+def _fill_orders(trades, risks):
+    """
+    Replay priced picks in time order per strategy, keeping only those an
+    account with the strategy's risk limits could actually have made
+
+    A pick is dropped when the strategy still holds the item, when its
+    cost exceeds the capital not tied up in open positions
+    (`max_total_investment`), or when `max_items_per_day` items were
+    already bought that calendar day. A position's cost is released when
+    its exit fills; positions without an exit keep it until the end.
+
+    Args:
+        trades (pd.DataFrame): Picks priced by `_price_exits`
+        risks (list): Risk settings per strategy
+    """
+    trades = trades.sort_values(["strategy", "snapshot_time", "name"], kind="stable").reset_index(drop=True)
+    strategies = trades["strategy"].to_numpy()
+    names = trades["name"].to_numpy()
+    costs = trades["cost"].to_numpy(dtype=float)
+    buy_times = trades["snapshot_time"].to_numpy("datetime64[ns]").astype(np.int64)
+    days = buy_times // (24 * 3600 * 10**9)
+    realized = trades["realized"].to_numpy(dtype=bool)
+    sell_times = pd.to_datetime(trades["sell_time"]).to_numpy("datetime64[ns]").astype(np.int64)
+    sell_times = np.where(realized, sell_times, np.iinfo(np.int64).max)
+
+    keep = np.zeros(len(trades), dtype=bool)
+    for strategy in np.unique(strategies):
+        capital = float(risks[strategy]["max_total_investment"])
+        max_items = risks[strategy]["max_items_per_day"]
+        exits = []  # (sell time, cost) of open positions, earliest exit first
+        held_until = {}  # Item -> exit time of its open position
+        bought = {}  # Calendar day -> items bought
+        for i in np.flatnonzero(strategies == strategy):
+            # Sales up to this snapshot free their capital before anything is bought
+            while exits and exits[0][0] <= buy_times[i]:
+                capital += heapq.heappop(exits)[1]
+            if held_until.get(names[i], buy_times[i]) > buy_times[i]:
+                continue
+            if costs[i] > capital + 1e-9 or bought.get(days[i], 0) >= max_items:
+                continue
+            keep[i] = True
+            capital -= costs[i]
+            bought[days[i]] = bought.get(days[i], 0) + 1
+            held_until[names[i]] = sell_times[i]
+            heapq.heappush(exits, (sell_times[i], costs[i]))
+    return trades[keep].reset_index(drop=True)
+
+
+def _price_exits(fills, prices, hold, commission_rate):
+    """Sell every fill at the first snapshot after its holding period, or mark it at the last price"""
+    prices = prices.rename(columns={"snapshot_time": "sell_time", "sp_suggested_price": "sell_price"})
+    prices = prices.dropna(subset=["sell_price"]).sort_values("sell_time")
+    sell_after = (fills["snapshot_time"] + hold).astype(prices["sell_time"].dtype)
+    fills = fills.assign(sell_after=sell_after).sort_values("sell_after")
+
+    fills = pd.merge_asof(
+        fills, prices, left_on="sell_after", right_on="sell_time", by="name", direction="forward"
+    )
+
+    # No snapshot late enough: value the position at the item's last known price
+    last_prices = prices.groupby("name")["sell_price"].last()
+    open_positions = fills["sell_time"].isna()
+    fills["realized"] = ~open_positions
+    fills.loc[open_positions, "sell_price"] = fills.loc[open_positions, "name"].map(last_prices)
+
+    fills["cost"] = fills["buy_price"] * fills["units"]
+    fills["pnl"] = (fills["sell_price"] * (1 - commission_rate) - fills["buy_price"]) * fills["units"]
+    return fills
+
+
+def journal_pnl(journal_path=None, start=None, end=None):
+    """
+    Realized profit of the real trades in the trading journal
+
+    Args:
+        journal_path (str): Trading journal CSV; the journal store by default
+        start, end (datetime): Only count trades sold in this window
+
+    Returns:
+        dict: trades, invested and pnl of completed trades
+    """
+    if journal_path is None:
+        # Completed trades only, with the sell-time window applied by SQLite's index
+        where, params = ["sell_price IS NOT NULL", "sell_time IS NOT NULL"], []
+        if start is not None:
+            where.append("sell_time >= ?")
+            params.append(pd.Timestamp(start).strftime(TIME_FORMAT))
+        if end is not None:
+            where.append("sell_time < ?")
+            params.append(pd.Timestamp(end).strftime(TIME_FORMAT))
+        completed = get_journal_store().frame(where=" AND ".join(where), params=params)
+    else:
+        journal = pd.read_csv(journal_path, parse_dates=["Sell Time"])
+        completed = journal.dropna(subset=["Sell Price", "Sell Time"])
+        if start is not None:
+            completed = completed[completed["Sell Time"] >= start]
+        if end is not None:
+            completed = completed[completed["Sell Time"] < end]
+
+    invested = (completed["Buy Price"] * completed["Quantity"]).sum()
+    pnl = ((completed["Sell Price"] - completed["Buy Price"]) * completed["Quantity"]).sum()
+    return {"trades": len(completed), "invested": invested, "pnl": pnl}
+
+
+def run_backtest(parameter_sets=None, start=None, end=None, hold_hours=None, workers=None):
+    """
+    Replay the price history through the analyzer and simulate the trades
+
+    Each history day is evaluated in a separate process with only the
+    columns the analyzer needs. Fills and exits are then replayed in time
+    order per strategy, within its capital and daily item limits, with
+    Skinport commission taken off every sale.
+
+    Args:
+        parameter_sets (list): Strategy/risk parameter sets as accepted by
+            `analyze_market_opportunities_batch` (default: config as is)
+        start, end (datetime): Restrict the replay to this window
+        hold_hours (float): Hours an item is held before it is sold
+        workers (int): Worker processes (default: all cores)
+
+    Returns:
+        tuple: (summary DataFrame with one row per parameter set,
+            DataFrame of all simulated trades)
+    """
+    logger = setup_logger("backtest")
+    config = load_config()
+    settings = config.get("backtest", {})
+    commission_rate = config['skinport']['commission_rate']
+    parameter_sets = parameter_sets or [{}]
+    hold = timedelta(hours=hold_hours if hold_hours is not None else settings.get("hold_hours", 24))
+    workers = workers or settings.get("workers") or os.cpu_count()
+
+    history = get_price_history()
+    days = [
+        d for d in history.partitions()
+        if (start is None or d >= f"{start:%Y-%m-%d}") and (end is None or d <= f"{end:%Y-%m-%d}")
+    ]
+    if not days:
+        raise RuntimeError(
+            f"No price history to backtest in {history.root} "
+            f"(old merged_markets files can be loaded with PriceHistory.import_legacy)"
+        )
+    logger.info(f"Backtesting {len(parameter_sets)} parameter set(s) over {len(days)} day(s)")
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(days))) as pool:
+        day_picks = list(pool.map(
+            _evaluate_day,
+            [str(Path(history.root) / f"date={d}") for d in days],
+            [parameter_sets] * len(days),
+            [commission_rate] * len(days)
+        ))
+
+    day_picks = [p for p in day_picks if p is not None]
+    if not day_picks:
+        logger.warning("No opportunities found anywhere in the history")
+        return pd.DataFrame(index=pd.RangeIndex(len(parameter_sets), name="strategy")), pd.DataFrame()
+    picks = pd.concat(day_picks, ignore_index=True)
+    if start is not None:
+        picks = picks[picks["snapshot_time"] >= start]
+    if end is not None:
+        picks = picks[picks["snapshot_time"] < end]
+
+    prices = history.history(start=start, end=end, columns=["sp_suggested_price"])
+    risks = [{**config['risk'], **p.get('risk', {})} for p in parameter_sets]
+    trades = _price_exits(picks[picks["units"] > 0], prices, hold, commission_rate)
+    trades = _fill_orders(trades, risks)
+
+    realized = trades["realized"].astype(bool)
+    summary = pd.DataFrame({
+        "trades": trades.groupby("strategy").size(),
+        "invested": trades.groupby("strategy")["cost"].sum(),
+        "realized_pnl": trades["pnl"].where(realized, 0.0).groupby(trades["strategy"]).sum(),
+        "unrealized_pnl": trades["pnl"].where(~realized, 0.0).groupby(trades["strategy"]).sum(),
+        "win_rate": (trades["pnl"] > 0).groupby(trades["strategy"]).mean() * 100,
+    }).reindex(range(len(parameter_sets)), fill_value=0)
+    summary["total_pnl"] = summary["realized_pnl"] + summary["unrealized_pnl"]
+    summary["roi_pct"] = np.where(
+        summary["invested"] > 0, summary["total_pnl"] / summary["invested"] * 100, 0.0
+    )
+    summary.index.name = "strategy"
+
+    logger.info(f"Backtest finished: {len(trades)} simulated trades")
+    return summary, trades
+
+
+if __name__ == "__main__":
+    summary, trades = run_backtest()
+    print(summary.to_string())
+    print(f"Trading journal: {journal_pnl()}")
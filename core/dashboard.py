@@ -0,0 +1,229 @@
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+# Opportunity columns sent to the browser; data age is derived there from `data_time`
+DASHBOARD_COLUMNS = [
+    'item_id', 'name', 'buy_market', 'buy_price', 'sell_market', 'sell_price',
+    'potential_profit', 'profit_pct', 'buy_quantity', 'units', 'investment', 'expected_profit',
+]
+KEEPALIVE_SECONDS = 15
+MAX_PER_PAGE = 500
+
+
+def _records(frame):
+    """JSON-ready rows, with NaN as null"""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def _drain(events):
+    while True:
+        try:
+            events.get_nowait()
+        except queue.Empty:
+            return
+
+
+def _encode(payload):
+    return json.dumps(payload, default=lambda value: value.item()).encode()
+
+
+class Dashboard:
+    """
+    Live opportunity dashboard served over local HTTP.
+
+    `publish` diffs each new opportunity set against the previous one by
+    item ID and pushes only entered, changed and removed rows to connected
+    browsers as one Server-Sent Event, encoded once for all clients. The
+    full set is available as paginated, sortable JSON, which the page only
+    requests on load and when a change touches rows it is not showing.
+
+        GET /                     Dashboard page
+        GET /api/opportunities    ?page=1&per_page=50&sort=profit_pct&order=desc
+        GET /events               Server-Sent Events stream of row changes
+    """
+
+    def __init__(self, host="127.0.0.1", port=8050):
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._frame = pd.DataFrame(columns=DASHBOARD_COLUMNS)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._version = 0
+        self._data_time = None
+        self._subscribers = set()
+        self._server = None
+        self._page = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def publish(self, opportunities, data_time=None):
+        """
+        Make a new opportunity set current and push its changes to clients
+
+        Args:
+            opportunities (pd.DataFrame): Analyzer output with item_id
+            data_time (float): Epoch time the oldest price data is current as of
+        """
+        frame = opportunities.reindex(columns=DASHBOARD_COLUMNS).reset_index(drop=True)
+        ids = frame['item_id'].to_numpy(dtype=np.int64)
+        hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+        with self._lock:
+            positions = pd.Index(self._ids).get_indexer(ids)
+            known = positions >= 0
+            changed = ~known
+            changed[known] = self._hashes[positions[known]] != hashes[known]
+            removed = self._ids[~np.isin(self._ids, ids)]
+            if not changed.any() and not len(removed) and data_time == self._data_time:
+                return
+            if changed.any() or len(removed):
+                self._version += 1
+            self._frame, self._ids, self._hashes = frame, ids, hashes
+            self._data_time = data_time
+            event = self._event("update", {
+                'version': self._version,
+                'data_time': data_time,
+                'total': len(frame),
+                'upsert': _records(frame[changed]),
+                'remove': removed.tolist(),
+            })
+            subscribers = list(self._subscribers)
+
+        for events in subscribers:
+            self._deliver(events, event)
+
+    def _event(self, name, payload):
+        return b"event: " + name.encode() + b"\ndata: " + _encode(payload) + b"\n\n"
+
+    def _deliver(self, events, event):
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            # Client too slow to keep up: drop its backlog and have it reload the page
+            _drain(events)
+            events.put_nowait(self._event("reset", {'version': self._version}))
+
+    def subscribe(self):
+        """Event queue for one client, starting with the current version"""
+        events = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.add(events)
+            events.put_nowait(self._event("hello", {'version': self._version, 'data_time': self._data_time}))
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.discard(events)
+
+    def page(self, page=1, per_page=50, sort='profit_pct', order='desc'):
+        """
+        One page of the current opportunity set
+
+        Raises:
+            ValueError: Unknown sort column or order
+        """
+        if sort not in DASHBOARD_COLUMNS or order not in ('asc', 'desc'):
+            raise ValueError(f"Cannot sort by {sort} {order}")
+        per_page = min(max(int(per_page), 1), MAX_PER_PAGE)
+        page = max(int(page), 1)
+        with self._lock:
+            frame, version, data_time = self._frame, self._version, self._data_time
+
+        ordered = frame.sort_values(sort, ascending=order == 'asc', na_position='last', kind='stable')
+        rows = ordered.iloc[(page - 1) * per_page:page * per_page]
+        return {
+            'version': version,
+            'data_time': data_time,
+            'total': len(frame),
+            'page': page,
+            'per_page': per_page,
+            'rows': _records(rows),
+        }
+
+    def page_html(self):
+        if self._page is None:
+            self._page = (TEMPLATE_DIR / "dashboard.html").read_bytes()
+        return self._page
+
+    def start(self):
+        """Serve the dashboard from a daemon thread"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _DashboardHandler)
+        self._server.dashboard = self
+        threading.Thread(target=self._server.serve_forever, name="DashboardServer", daemon=True).start()
+        return self
+
+    def shutdown(self):
+        """Stop the server and end every open event stream"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            _drain(events)
+            events.put_nowait(None)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        dashboard = self.server.dashboard
+        if url.path == "/":
+            self._send(dashboard.page_html(), "text/html; charset=utf-8")
+        elif url.path == "/api/opportunities":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                body = _encode(dashboard.page(**{
+                    key: query[key] for key in ('page', 'per_page', 'sort', 'order') if key in query
+                }))
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+            self._send(body, "application/json")
+        elif url.path == "/events":
+            self._stream(dashboard)
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, dashboard):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        events = dashboard.subscribe()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    event = f": keepalive {time.time():.0f}\n\n".encode()
+                if event is None:
+                    break
+                self.wfile.write(event)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            dashboard.unsubscribe(events)
+
+    def log_message(self, format, *args):
+        pass
@@ -1,156 +1,490 @@
+import asyncio
+import functools
 import threading
 import time
 import webbrowser
 import os
+import signal
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime
 from markets.skinport.sp_get_items import SkinportAPI
 from markets.lis_skins.ls_get_items import LisSkinsAPI
-from markets.merge_markets import merge_markets
-from core.analyzer import analyze_market_opportunities, generate_html_report
+from markets.merge_markets import MergeState, merge_markets
+from markets.fetcher import MarketFetcher
+from markets.snapshot_store import get_snapshot_store
+from markets.price_history import get_price_history
+from core.analyzer import OpportunityTracker, generate_html_report
+from core.dashboard import Dashboard
 from utils.logger import setup_logger
-from utils.helpers import load_config
+from utils.helpers import CONFIG_PATH, load_config, validate_config
+from utils.rate_limiter import flush_rate_limits, get_rate_limiter
+from utils.metrics import DATA_AGE, timed, dump_json, start_metrics_server
 
 class MarketEngine:
-    def __init__(self):
+    """
+    Fetch, merge, analyze and report on a fixed schedule.
+
+    Args:
+        on_stage (callable): Called as `on_stage(stage, message)` when a
+            cycle moves to a new stage
+        on_cycle (callable): Called as `on_cycle(opportunities, changes)`
+            after every analysis
+
+    Both callbacks run on engine threads and must not block; a GUI should
+    hand them over to its own thread, e.g. by emitting a Qt signal.
+    """
+    # Config sections that are swapped in while running; the rest needs a restart
+    HOT_RELOAD_SECTIONS = ("strategy", "risk")
+
+    def __init__(self, on_stage=None, on_cycle=None):
         self.logger = setup_logger("market_engine")
-        self.config = load_config()
-        self.cycle_interval = self.config.get("cycle_interval", 300)  # Default 5 minutes
+        self.on_stage = on_stage
+        self.on_cycle = on_cycle
+        self.config = validate_config(load_config())
+        self._config_mtime = self._read_config_mtime()
+        self._reload_requested = threading.Event()
+        self.engine_config = self.config.get("engine", {})
+        self.cycle_interval = self.engine_config.get("cycle_interval", 300)  # Default 5 minutes
         self.stop_event = threading.Event()
+        self.last_merged = None  # Merged frame of the last successful cycle
+        self._last_data_time = None  # Its per-market data times
+        self._last_depths = None  # And the order book depth behind it
+        self._processing = None  # Future of the last job handed to the executor
+        self._merge_state = MergeState()  # Per-item prices, so each cycle only recomputes changes
+        self._tracker = OpportunityTracker()
+        self.last_changes = None  # Items that entered or left the opportunity set last time
+        self._compacted_day = None
+        self.fetcher = MarketFetcher(self.config)
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MarketProcessor")
+        self.metrics_config = self.config.get("metrics", {})
+        self._metrics_server = None
+        self.dashboard_config = self.config.get("dashboard", {})
+        self._dashboard = None
+        self._opened = False  # The report or dashboard is only opened in a browser once
         self.logger.info("MarketEngine initialized")
 
-    def _fetch_market_data(self, api_func, market_name, results, errors):
-        """Thread target for market data fetching with detailed logging"""
-        try:
-            self.logger.info(f"Starting {market_name} data fetch...")
-            # Handle currency parameter specifically for Skinport
-            if market_name == "Skinport":
-                result = api_func(currency="EUR")
-            else:
-                result = api_func()
-                
-            if result is None:
-                errors[market_name] = f"{market_name} returned None"
-                self.logger.error(f"{market_name} returned no data")
-            elif isinstance(result, pd.DataFrame) and result.empty:
-                errors[market_name] = f"{market_name} returned empty DataFrame"
-                self.logger.error(f"{market_name} returned empty data")
-            else:
-                results[market_name] = result
-                item_count = len(result) if hasattr(result, '__len__') else "N/A"
-                self.logger.info(f"{market_name} fetch successful ({item_count} items)")
-        except Exception as e:
-            errors[market_name] = str(e)
-            self.logger.error(f"{market_name} fetch failed: {str(e)}")
-            self.logger.debug(traceback.format_exc())
+    def _market_jobs(self):
+        """Fetch coroutine and timeout for every market"""
+        default_timeout = self.engine_config.get("fetch_timeout", 120)
+        sp_config = self.config.get("skinport", {})
+        ls_config = self.config.get("lis_skins", {})
+        return {
+            "Skinport": (
+                functools.partial(SkinportAPI.fetch_items, currency="EUR"),
+                sp_config.get("timeout", default_timeout)
+            ),
+            "LisSkins": (
+                functools.partial(LisSkinsAPI.fetch_items, stream=ls_config.get("stream", False)),
+                ls_config.get("timeout", default_timeout)
+            ),
+        }
 
-    def run_cycle(self):
-        """Run single analysis cycle with threading and detailed diagnostics"""
-        self.logger.info("Starting new analysis cycle")
+    def _budget_delay(self):
+        """Seconds until every market has rate limit budget for its next fetch"""
+        return max(
+            get_rate_limiter(api.rate_limit).delay()
+            for api in (SkinportAPI, LisSkinsAPI)
+        )
+
+    def _check_market_data(self, market_name, outcome, timeout, results, errors):
+        """Validate a single market fetch outcome with detailed logging"""
+        if isinstance(outcome, asyncio.TimeoutError):
+            errors[market_name] = f"Fetch timed out after {timeout}s"
+            self.logger.error(f"{market_name} timed out")
+        elif isinstance(outcome, BaseException):
+            errors[market_name] = str(outcome)
+            self.logger.error(f"{market_name} fetch failed: {str(outcome)}")
+            self.logger.debug("".join(traceback.format_exception(outcome)))
+        elif outcome is None:
+            errors[market_name] = f"{market_name} returned None"
+            self.logger.error(f"{market_name} returned no data")
+        elif isinstance(outcome, pd.DataFrame) and outcome.empty:
+            errors[market_name] = f"{market_name} returned empty DataFrame"
+            self.logger.error(f"{market_name} returned empty data")
+        else:
+            results[market_name] = outcome
+            item_count = len(outcome) if hasattr(outcome, '__len__') else "N/A"
+            self.logger.info(f"{market_name} fetch successful ({item_count} items)")
+
+    async def _fetch(self):
+        """
+        Fetch all markets concurrently on the engine's event loop
+
+        Returns:
+            dict: Snapshot with market `results`, per-market `data_time`
+                (when the prices were last known current) and an `unchanged`
+                flag, or None if any market failed
+        """
         results = {"Skinport": None, "LisSkins": None}
         errors = {}
         
-        # Create and start threads
-        threads = [
-            threading.Thread(
-                target=self._fetch_market_data,
-                args=(SkinportAPI.get_items, "Skinport", results, errors),
-                name="SkinportFetcher"
-            ),
-            threading.Thread(
-                target=self._fetch_market_data,
-                args=(LisSkinsAPI.get_items, "LisSkins", results, errors),
-                name="LisSkinsFetcher"
-            )
-        ]
-        
-        for t in threads:
-            t.daemon = True
-            t.start()
-        
-        # Wait for both threads to complete with timeout
-        timeout = self.config.get("fetch_timeout", 120)
-        for t in threads:
-            t.join(timeout)
-            if t.is_alive():
-                errors[t.name] = f"Thread timed out after {timeout}s"
-                self.logger.error(f"{t.name} timed out")
+        jobs = self._market_jobs()
+        try:
+            outcomes = await self.fetcher.run(jobs)
+        except asyncio.CancelledError:
+            self.logger.warning("Market fetch cancelled")
+            return None
+        
+        for market_name, outcome in outcomes.items():
+            self._check_market_data(market_name, outcome, jobs[market_name][1], results, errors)
         
         # Validate results
         if errors:
             self.logger.error(f"Market fetch completed with errors: {errors}")
             return None
             
-        if not all(results.values()):
+        if any(result is None for result in results.values()):
             self.logger.error("One or more markets returned no data")
             return None
         
+        # Lis-Skins prices are only as fresh as its export
+        data_time = dict(self.fetcher.fetched_at)
+        ls_data = results["LisSkins"]
+        last_update = ls_data.attrs.get("last_update") if isinstance(ls_data, pd.DataFrame) \
+            else ls_data.get("last_update")
+        if last_update:
+            data_time["LisSkins"] = min(data_time["LisSkins"], last_update)
+        
+        return {
+            "results": results,
+            "data_time": data_time,
+            "unchanged": SkinportAPI.not_modified and LisSkinsAPI.not_modified,
+            "depths": {"LisSkins": LisSkinsAPI.depth},
+        }
+
+    def _process(self, snapshot):
+        """Merge, analyze and report a fetched snapshot; returns the report path or None"""
+        results = snapshot["results"]
+        
+        # Nothing changed on either market since the last merge
+        if self.last_merged is not None and snapshot["unchanged"]:
+            self.logger.info("Market data unchanged since last cycle, skipping merge and analysis")
+            return None
+        
         # Process and analyze data
         try:
+            self._notify_stage("merge", "Merging market data")
             self.logger.info("Merging market data...")
-            merged = merge_markets(results["LisSkins"], results["Skinport"])
+            merged = merge_markets(results["LisSkins"], results["Skinport"], state=self._merge_state)
+            self.last_merged = merged
+            self._last_data_time = snapshot["data_time"]
+            self._last_depths = snapshot["depths"]
             self.logger.info(f"Merged data shape: {merged.shape}")
             
-            self.logger.info("Analyzing opportunities...")
-            opportunities = analyze_market_opportunities(merged)
+            # Once a day, fold the previous days' history parts into single files
+            today = datetime.now().date()
+            if self._compacted_day != today:
+                get_price_history().compact()
+                self._compacted_day = today
             
-            if opportunities.empty:
-                self.logger.warning("No profitable opportunities found")
-                return None
-                
-            self.logger.info(f"Found {len(opportunities)} opportunities")
-            
-            # Generate report
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            report_path = f"data/html_report/market_opportunities.html"
-            os.makedirs(os.path.dirname(report_path), exist_ok=True)
-            
-            self.logger.info(f"Generating report at {report_path}")
-            generate_html_report(opportunities) 
-            
-            return report_path
+            return self._analyze_and_report(merged, snapshot["data_time"], snapshot["depths"])
             
         except Exception as e:
             self.logger.error(f"Analysis failed: {str(e)}")
             self.logger.debug(traceback.format_exc())
             return None
 
-    def start(self):
-        """Main engine loop with enhanced diagnostics"""
-        self.logger.info(f"Starting market engine. Cycle interval: {self.cycle_interval}s")
+    def _analyze_and_report(self, merged, data_time, depths=None):
+        """Analyze a merged frame with the active config and write the report"""
+        config = self.config  # One consistent config for the whole analysis
+        
+        self._notify_stage("analyze", "Analyzing opportunities")
+        self.logger.info("Analyzing opportunities...")
+        opportunities, changes = self._tracker.update(
+            merged, self._merge_state.take_changes(), config, depths
+        )
+        self._record_changes(changes)
+        
+        if opportunities.empty:
+            self._publish_dashboard(opportunities, data_time)
+            self._notify_cycle(opportunities, changes)
+            self.logger.warning("No profitable opportunities found")
+            return None
+        
+        # Age of the price data behind each opportunity, at report time
+        now = time.time()
+        opportunities["ls_age_s"] = now - data_time["LisSkins"]
+        opportunities["sp_age_s"] = now - data_time["Skinport"]
+        opportunities["data_age_s"] = opportunities[["ls_age_s", "sp_age_s"]].max(axis=1)
+        DATA_AGE.observe(now - data_time["LisSkins"], market="lis_skins")
+        DATA_AGE.observe(now - data_time["Skinport"], market="skinport")
+        self._publish_dashboard(opportunities, data_time)
+        self._notify_cycle(opportunities, changes)
+            
+        self.logger.info(
+            f"Found {len(opportunities)} opportunities "
+            f"(price data up to {opportunities['data_age_s'].max():.0f}s old)"
+        )
+        
+        # Generate report; None when it is unchanged, so only real writes are announced
+        report_path = generate_html_report(opportunities, config=config)
+        if report_path is None:
+            self.logger.info("Opportunities unchanged, report not rewritten")
+        return report_path
+
+    def _record_changes(self, changes):
+        """Log items entering or leaving the opportunity set and append them to the change log"""
+        self.last_changes = changes
+        if changes.empty:
+            return
+        for change in changes.itertuples():
+            self.logger.debug(f"Opportunity {change.change}: {change.name} ({change.profit_pct:.1f}%)")
+        
+        log_path = os.path.join(self.config['data']['reports'], "opportunity_changes.csv")
+        changes.assign(time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")).to_csv(
+            log_path, mode="a", index=False, header=not os.path.exists(log_path)
+        )
+
+    def _read_config_mtime(self):
+        try:
+            return os.stat(CONFIG_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    def request_reload(self, *args):
+        """Ask for a config reload at the next check; safe from signal handlers and other threads"""
+        self._reload_requested.set()
+
+    def reload_config(self):
+        """
+        Swap in edited strategy/risk settings if config.yaml changed
+        
+        The new file is validated first; an invalid edit is logged and the
+        running config is kept. The swap replaces `self.config` in one
+        assignment, so an analysis in progress finishes with the old values.
+        
+        Returns:
+            bool: True if the active config changed
+        """
+        mtime = self._read_config_mtime()
+        if not self._reload_requested.is_set() and mtime == self._config_mtime:
+            return False
+        self._reload_requested.clear()
+        self._config_mtime = mtime
         
+        try:
+            new_config = validate_config(load_config())
+        except (RuntimeError, ValueError) as e:
+            self.logger.error(f"Config reload rejected, keeping current settings: {str(e)}")
+            return False
+        
+        changed = [s for s in self.HOT_RELOAD_SECTIONS if new_config.get(s) != self.config.get(s)]
+        if not changed:
+            return False
+        
+        self.config = {**self.config, **{s: new_config[s] for s in self.HOT_RELOAD_SECTIONS}}
+        self.logger.info(f"Config reloaded: {', '.join(changed)} updated")
+        return True
+
+    def _reanalyze(self):
+        """Executor target: re-run only the analysis on the last merged frame"""
+        try:
+            with timed("reanalyze"):
+                report_path = self._analyze_and_report(
+                    self.last_merged, self._last_data_time, self._last_depths
+                )
+            if report_path:
+                self._publish_report(report_path)
+        except Exception as e:
+            self.logger.error(f"Re-analysis failed: {str(e)}")
+            self.logger.debug(traceback.format_exc())
+
+    def _on_sighup(self):
+        self.request_reload()
+        self._apply_reload()
+
+    def _submit(self, job, *args):
+        """Queue work on the processing thread; jobs run one at a time, in order"""
+        self._processing = self._loop.run_in_executor(self._executor, job, *args)
+        return self._processing
+
+    def _apply_reload(self):
+        """Reload the config and re-analyze the cached merge right away if it changed"""
+        if self.reload_config() and self.last_merged is not None:
+            self.logger.info("Re-running analysis on the last merged data")
+            self._submit(self._reanalyze)
+
+    def run_cycle(self):
+        """Run single analysis cycle with concurrent fetches and detailed diagnostics"""
+        self.logger.info("Starting new analysis cycle")
+        self.reload_config()
+        snapshot = self._loop.run_until_complete(self._fetch())
+        if snapshot is None:
+            return None
+        with timed("process"):
+            report_path = self._process(snapshot)
+        self._dump_metrics()
+        return report_path
+
+    def _publish_report(self, report_path):
+        """Announce a freshly generated report"""
+        abs_path = os.path.abspath(report_path)
+        # Print clickable link
+        print(f"\n[REPORT] file://{abs_path}")
+        self.logger.info(f"Report generated: file://{abs_path}")
+        self._notify_stage("report", f"Report generated: file://{abs_path}")
+        
+        # Open the live dashboard (or the report without one) once, not every cycle
+        if self.engine_config.get("auto_open", True) and not self._opened:
+            self._opened = True
+            webbrowser.open(self._dashboard.url if self._dashboard is not None else f"file://{abs_path}")
+
+    def _notify_stage(self, stage, message):
+        if self.on_stage is not None:
+            self.on_stage(stage, message)
+
+    def _notify_cycle(self, opportunities, changes):
+        if self.on_cycle is not None:
+            self.on_cycle(opportunities, changes)
+
+    def _publish_dashboard(self, opportunities, data_time):
+        """Push the opportunity changes to dashboard clients"""
+        if self._dashboard is not None:
+            self._dashboard.publish(opportunities, min(data_time.values()))
+
+    def _process_and_publish(self, snapshot):
+        """Executor target: process a snapshot off the event loop"""
+        try:
+            with timed("process"):
+                report_path = self._process(snapshot)
+            self._dump_metrics()
+            if report_path:
+                self._publish_report(report_path)
+        except Exception as e:
+            self.logger.critical(f"Engine cycle crashed: {str(e)}")
+            self.logger.debug(traceback.format_exc())
+
+    def _dump_metrics(self):
+        """Write the metrics JSON dump configured under `metrics.json_path`"""
+        json_path = self.metrics_config.get("json_path")
+        if json_path:
+            try:
+                dump_json(json_path)
+            except OSError as e:
+                self.logger.warning(f"Could not write metrics: {str(e)}")
+
+    def _start_metrics_server(self):
+        """Expose metrics for scraping when `metrics.enabled` is set"""
+        if not self.metrics_config.get("enabled", False) or self._metrics_server is not None:
+            return
+        host = self.metrics_config.get("host", "127.0.0.1")
+        port = self.metrics_config.get("port", 9108)
+        try:
+            self._metrics_server = start_metrics_server(host, port)
+            self.logger.info(f"Metrics available at http://{host}:{port}/metrics")
+        except OSError as e:
+            self.logger.warning(f"Could not start metrics server: {str(e)}")
+
+    def _start_dashboard(self):
+        """Serve the live dashboard when `dashboard.enabled` is set"""
+        if not self.dashboard_config.get("enabled", False) or self._dashboard is not None:
+            return
+        host = self.dashboard_config.get("host", "127.0.0.1")
+        port = self.dashboard_config.get("port", 8050)
+        try:
+            self._dashboard = Dashboard(host, port).start()
+            self.logger.info(f"Dashboard available at {self._dashboard.url}")
+        except OSError as e:
+            self.logger.warning(f"Could not start dashboard: {str(e)}")
+
+    async def _wait(self, delay):
+        """
+        Sleep on the event loop, waking up early when the engine is stopped
+        
+        Config edits are picked up while waiting, polling every
+        `engine.config_poll_interval` seconds.
+        """
+        poll_interval = self.engine_config.get("config_poll_interval", 2)
+        deadline = time.monotonic() + delay
+        while not self.stop_event.is_set():
+            self._apply_reload()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await self._loop.run_in_executor(None, self.stop_event.wait, min(remaining, poll_interval))
+
+    async def _run(self):
+        """
+        Pipelined engine loop
+
+        Fetches run on the event loop on a fixed schedule, while merge,
+        analysis and report of the previous snapshot run in a worker thread.
+        The next download therefore starts on time (and as soon as the rate
+        limits allow) instead of after the previous report is written.
+        Snapshots are still processed one at a time, in fetch order.
+        """
         while not self.stop_event.is_set():
             cycle_start = time.time()
             self.logger.info("-" * 60)
             self.logger.info(f"Starting cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
             try:
-                report_path = self.run_cycle()
-                if report_path:
-                    abs_path = os.path.abspath(report_path)
-                    # Print clickable link
-                    print(f"\n[REPORT] file://{abs_path}")
-                    self.logger.info(f"Report generated: file://{abs_path}")
-                    
-                    if self.config.get("auto_open", True):
-                        webbrowser.open(f"file://{abs_path}")
+                self._apply_reload()
+                self._notify_stage("fetch", "Fetching market data")
+                snapshot = await self._fetch()
+                if snapshot is not None and not self.stop_event.is_set():
+                    # Keep processing ordered: hand over only once the previous snapshot is done
+                    if self._processing is not None:
+                        await self._processing
+                    self._submit(self._process_and_publish, snapshot)
+                elif snapshot is None and not self.stop_event.is_set():
+                    self._notify_stage("fetch_failed", "Market fetch failed, retrying next cycle")
             except Exception as e:
                 self.logger.critical(f"Engine cycle crashed: {str(e)}")
                 self.logger.debug(traceback.format_exc())
             
-            # Calculate sleep time
+            # Schedule the next fetch from this fetch's start, no earlier than
+            # the moment all markets have rate limit budget again
             elapsed = time.time() - cycle_start
-            sleep_time = max(0, self.cycle_interval - elapsed)
+            sleep_time = max(0, self.cycle_interval - elapsed, self._budget_delay())
             
             if sleep_time > 0:
-                self.logger.info(f"Cycle completed in {elapsed:.1f}s. Next cycle in {sleep_time:.1f}s")
-                self.stop_event.wait(sleep_time)
+                self.logger.info(f"Fetch completed in {elapsed:.1f}s. Next fetch in {sleep_time:.1f}s")
+                self._notify_stage("wait", f"Next fetch in {sleep_time:.0f}s")
+                await self._wait(sleep_time)
+        
+        if self._processing is not None:
+            await self._processing
+
+    def start(self):
+        """Main engine loop with enhanced diagnostics"""
+        self.logger.info(f"Starting market engine. Cycle interval: {self.cycle_interval}s")
+        self._start_metrics_server()
+        self._start_dashboard()
+        get_price_history().recover()
+        if hasattr(signal, "SIGHUP"):
+            try:
+                # `kill -HUP <pid>` reloads the config without waiting for the next poll
+                self._loop.add_signal_handler(signal.SIGHUP, self._on_sighup)
+            except (RuntimeError, ValueError):
+                pass  # Not in the main thread, file polling still applies
+        
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            # Release pooled connections, finish pending snapshot writes and save rate limit budgets
+            self._loop.run_until_complete(self.fetcher.close())
+            get_snapshot_store().flush()
+            flush_rate_limits()
+            self._dump_metrics()
+            if self._metrics_server is not None:
+                self._metrics_server.shutdown()
+                self._metrics_server = None
+            if self._dashboard is not None:
+                self._dashboard.shutdown()
+                self._dashboard = None
+            self._executor.shutdown()
+            self._loop.close()
+            self._notify_stage("stopped", "Engine stopped")
     
     def stop(self):
-        """Gracefully stop the engine"""
+        """Gracefully stop the engine, cancelling any fetch in progress"""
         self.logger.info("Stopping market engine")
         self.stop_event.set()
+        self.fetcher.cancel()
 
 if __name__ == "__main__":
     engine = MarketEngine()
@@ -0,0 +1,150 @@
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+import numpy as np
+
+# Skin-name abbreviations, indexed both ways so "(FN)" and "Factory New" find each other
+ALIASES = {
+    "fn": ("factory", "new"),
+    "mw": ("minimal", "wear"),
+    "ft": ("field", "tested"),
+    "ww": ("well", "worn"),
+    "bs": ("battle", "scarred"),
+    "st": ("stattrak",),
+}
+FUZZY_SIMILARITY = 0.5  # Lowest trigram similarity of a misspelt query token
+
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+
+def _name_tokens(name):
+    """Tokens of a product name, with abbreviations and their expansions added"""
+    tokens = _tokens(name)
+    expanded = set(tokens)
+    joined = " ".join(tokens)
+    for short, words in ALIASES.items():
+        if short in expanded:
+            expanded.update(words)
+        if re.search(rf"\b{' '.join(words)}\b", joined):
+            expanded.add(short)
+    return expanded
+
+
+def _trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class JournalSearchIndex:
+    """
+    Fuzzy product search over the rows of the trading journal.
+
+    Product names are indexed once per distinct name: each name is split
+    into lowercase tokens, which go into a sorted vocabulary for prefix
+    lookups and a trigram index for misspellings, so "p250 franklin fn"
+    finds "P250 | Franklin (Factory New)". Rows only hold the number of
+    their product name, kept in arrays with spare capacity at the end, so
+    inserting, editing or deleting a trade is an array update. A search
+    resolves the query against the vocabulary and then selects rows with
+    one vectorized `isin`, returning row positions for
+    `RowSubsetProxy.set_rows`.
+    """
+
+    def __init__(self):
+        self._names = {}  # Product name -> name number
+        self._vocabulary = []  # Sorted tokens
+        self._token_names = {}  # Token -> numbers of the names containing it
+        self._trigram_tokens = {}  # Trigram -> tokens containing it
+        self._row_names = np.empty(0, dtype=np.int64)
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def _name(self, product):
+        """Number of a product name, indexing the name the first time it is seen"""
+        number = self._names.get(product)
+        if number is None:
+            number = self._names[product] = len(self._names)
+            for token in _name_tokens(product):
+                names = self._token_names.get(token)
+                if names is None:
+                    names = self._token_names[token] = set()
+                    insort(self._vocabulary, token)
+                    for trigram in _trigrams(token):
+                        self._trigram_tokens.setdefault(trigram, set()).add(token)
+                names.add(number)
+        return number
+
+    def reset(self, frame):
+        """Index every row of a journal DataFrame"""
+        codes, products = frame["Product"].factorize()
+        numbers = np.array([self._name(product) for product in products], dtype=np.int64)
+        self._row_names = numbers[codes] if len(codes) else np.empty(0, dtype=np.int64)
+        self._row_ids = frame["ID"].to_numpy(dtype=np.int64)
+        self._rows = len(frame)
+
+    def append(self, trade):
+        """Index a trade added at the end of the journal"""
+        if self._rows == len(self._row_names):
+            # Double the capacity, so appending stays amortized constant time
+            capacity = max(2 * self._rows, 64)
+            self._row_names = np.resize(self._row_names, capacity)
+            self._row_ids = np.resize(self._row_ids, capacity)
+        self._row_names[self._rows] = self._name(trade["Product"])
+        self._row_ids[self._rows] = int(trade["ID"])
+        self._rows += 1
+
+    def update(self, row, trade):
+        """Re-index the trade at `row` after an edit"""
+        self._row_names[row] = self._name(trade["Product"])
+        self._row_ids[row] = int(trade["ID"])
+
+    def delete(self, row):
+        """Drop the trade at `row`; later rows move up by one, as in the journal"""
+        self._row_names = np.delete(self._row_names[:self._rows], row)
+        self._row_ids = np.delete(self._row_ids[:self._rows], row)
+        self._rows -= 1
+
+    def _token_matches(self, token):
+        """Names with a token that starts with `token` or is a close misspelling of it"""
+        names = set()
+        start = bisect_left(self._vocabulary, token)
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(token):
+                break
+            names |= self._token_names[candidate]
+
+        if len(token) >= 3:
+            trigrams = _trigrams(token)
+            shared = Counter(
+                candidate for trigram in trigrams for candidate in self._trigram_tokens.get(trigram, ())
+            )
+            for candidate, count in shared.items():
+                if 2 * count / (len(trigrams) + len(_trigrams(candidate))) >= FUZZY_SIMILARITY:
+                    names |= self._token_names[candidate]
+        return names
+
+    def search(self, text):
+        """
+        Rows whose product matches every token of `text`, or whose ID contains it
+
+        Returns:
+            np.ndarray: Ascending row positions, or None for an empty query
+        """
+        tokens = _tokens(text)
+        if not tokens:
+            return None
+        names = None
+        for token in tokens:
+            names = self._token_matches(token) if names is None else names & self._token_matches(token)
+            if not names:
+                break
+        mask = np.isin(self._row_names[:self._rows], np.fromiter(names, dtype=np.int64, count=len(names)))
+        query = str(text).strip()
+        if query.isdigit():
+            mask |= np.char.find(self._row_ids[:self._rows].astype(str), query) >= 0
+        return np.flatnonzero(mask)
@@ -0,0 +1,166 @@
+import math
+from bisect import bisect_left, insort
+import numpy as np
+import pandas as pd
+
+# Aggregates whose versions are tracked separately, so each view redraws only on its own changes
+STATUS, PRODUCTS, DAYS = "status", "products", "days"
+
+
+def _trade_profit(trade):
+    """(profit, product, sell day) of a completed trade, or None for an open one"""
+    sell_price = trade.get("Sell Price")
+    if sell_price is None or pd.isna(sell_price):
+        return None
+    profit = (sell_price - trade.get("Buy Price", np.nan)) * trade.get("Quantity", np.nan)
+    sell_time = trade.get("Sell Time")
+    day = None if sell_time is None or pd.isna(sell_time) else pd.Timestamp(sell_time).date()
+    return (0.0 if pd.isna(profit) else float(profit)), trade.get("Product"), day
+
+
+def _same(a, b):
+    """Equal up to float rounding from adding and removing the same trade"""
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-9)
+
+
+class JournalAggregates:
+    """
+    Journal totals kept up to date by delta instead of recomputed.
+
+    Holds the trade counts by status, total profit, profit by product and
+    profit by sell day. Each insert, edit or delete only adds and removes
+    the contributions of the trades involved. `version` holds one counter
+    per aggregate (STATUS, PRODUCTS, DAYS), which is bumped only when
+    that aggregate actually changed. A view compares it to the version it
+    last drew and skips redrawing otherwise. Profit follows the journal:
+    (sell price - buy price) * quantity of trades with a sell price.
+    """
+
+    def __init__(self):
+        self.version = {STATUS: 0, PRODUCTS: 0, DAYS: 0}
+        self._clear()
+
+    def _clear(self):
+        self.trades = 0
+        self.status_counts = {}
+        self.total_profit = 0.0
+        self.profit_by_product = {}
+        self.profit_by_day = {}
+        self.days = []  # Sorted keys of profit_by_day
+        self._product_trades = {}  # Completed trades per product, to drop emptied products
+        self._day_trades = {}
+
+    def reset(self, frame):
+        """Rebuild from a whole journal DataFrame"""
+        before = self._state()
+        self._clear()
+        self.trades = len(frame)
+        if len(frame):
+            self.status_counts = frame["Status"].value_counts().to_dict()
+            completed = frame[frame["Sell Price"].notna()]
+            profit = ((completed["Sell Price"] - completed["Buy Price"]) * completed["Quantity"]).fillna(0.0)
+            self.total_profit = float(profit.sum())
+            by_product = profit.groupby(completed["Product"]).agg(["sum", "count"])
+            self.profit_by_product = by_product["sum"].to_dict()
+            self._product_trades = by_product["count"].to_dict()
+            sell_day = pd.to_datetime(completed["Sell Time"]).dt.date
+            by_day = profit.groupby(sell_day).agg(["sum", "count"])
+            self.profit_by_day = by_day["sum"].to_dict()
+            self._day_trades = by_day["count"].to_dict()
+            self.days = sorted(self.profit_by_day)
+        return self._bump(before, self._state())
+
+    def apply(self, removed=(), added=()):
+        """
+        Account for trades that left and entered the journal
+
+        An edit is the old version of the trade removed and the new one added.
+
+        Args:
+            removed (list): Journal dicts of trades deleted or before an edit
+            added (list): Journal dicts of trades inserted or after an edit
+
+        Returns:
+            set: Aggregates that changed (STATUS, PRODUCTS, DAYS)
+        """
+        changes = [(trade, -1) for trade in removed] + [(trade, 1) for trade in added]
+        completed = [(_trade_profit(trade), sign) for trade, sign in changes]
+        products = {c[1] for c, _ in completed if c is not None}
+        days = {c[2] for c, _ in completed if c is not None and c[2] is not None}
+        statuses = {trade.get("Status") for trade, _ in changes}
+        before = self._state(statuses, products, days)
+
+        for trade, sign in changes:
+            self.trades += sign
+            status = trade.get("Status")
+            count = self.status_counts.get(status, 0) + sign
+            if count:
+                self.status_counts[status] = count
+            else:
+                self.status_counts.pop(status, None)
+        for contribution, sign in completed:
+            if contribution is None:
+                continue
+            profit, product, day = contribution
+            self.total_profit += sign * profit
+            self._add(self.profit_by_product, self._product_trades, product, sign * profit, sign)
+            if day is not None:
+                self._add(self.profit_by_day, self._day_trades, day, sign * profit, sign)
+        if not self.trades:
+            self.total_profit = 0.0
+
+        return self._bump(before, self._state(statuses, products, days))
+
+    def _add(self, sums, counts, key, profit, sign):
+        count = counts.get(key, 0) + sign
+        if count > 0:
+            if key not in counts and sums is self.profit_by_day:
+                insort(self.days, key)
+            counts[key] = count
+            sums[key] = sums.get(key, 0.0) + profit
+        else:
+            counts.pop(key, None)
+            sums.pop(key, None)
+            if sums is self.profit_by_day:
+                position = bisect_left(self.days, key)
+                if position < len(self.days) and self.days[position] == key:
+                    del self.days[position]
+
+    def _state(self, statuses=None, products=None, days=None):
+        """Values of the given keys of each aggregate, or of all keys"""
+        statuses = self.status_counts if statuses is None else statuses
+        products = self.profit_by_product if products is None else products
+        days = self.profit_by_day if days is None else days
+        return {
+            STATUS: (self.trades, self.total_profit, {s: self.status_counts.get(s) for s in statuses}),
+            PRODUCTS: {p: self.profit_by_product.get(p) for p in products},
+            DAYS: {d: self.profit_by_day.get(d) for d in days},
+        }
+
+    def _bump(self, before, after):
+        old_status, new_status = before[STATUS], after[STATUS]
+        changed = set()
+        if (old_status[0] != new_status[0] or not _same(old_status[1], new_status[1])
+                or not self._same_values(old_status[2], new_status[2])):
+            changed.add(STATUS)
+        for name in (PRODUCTS, DAYS):
+            if not self._same_values(before[name], after[name]):
+                changed.add(name)
+        for name in changed:
+            self.version[name] += 1
+        return changed
+
+    @staticmethod
+    def _same_values(before, after):
+        keys = before.keys() | after.keys()
+        return all(_same(before.get(key), after.get(key)) for key in keys)
+
+    @property
+    def active(self):
+        return self.status_counts.get("Active", 0)
+
+    def cumulative_profit(self):
+        """(sell days, cumulative profit) of completed trades, in date order"""
+        return list(self.days), np.cumsum([self.profit_by_day[day] for day in self.days])
@@ -0,0 +1,264 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.helpers import load_config
+from utils.logger import setup_logger
+
+_store = None
+_store_lock = threading.Lock()
+
+# Journal column -> database column
+COLUMNS = {
+    "ID": "id",
+    "Product": "product",
+    "Buy Price": "buy_price",
+    "Quantity": "quantity",
+    "Buy Time": "buy_time",
+    "Analysis Time": "analysis_time",
+    "Sell Price": "sell_price",
+    "Sell Time": "sell_time",
+    "Profit (%)": "profit_pct",
+    "Status": "status",
+}
+TIME_COLUMNS = ["Buy Time", "Analysis Time", "Sell Time"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product TEXT NOT NULL,
+    buy_price REAL,
+    quantity INTEGER,
+    buy_time TEXT,
+    analysis_time TEXT,
+    sell_price REAL,
+    sell_time TEXT,
+    profit_pct REAL,
+    status TEXT NOT NULL DEFAULT 'Active'
+);
+CREATE INDEX IF NOT EXISTS trades_product ON trades (product);
+CREATE INDEX IF NOT EXISTS trades_status ON trades (status);
+CREATE INDEX IF NOT EXISTS trades_buy_time ON trades (buy_time);
+CREATE INDEX IF NOT EXISTS trades_sell_time ON trades (sell_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_db(value):
+    """Plain SQLite value of a journal field"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):  # Includes pd.Timestamp
+        return value.strftime(TIME_FORMAT)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def journal_row(trade):
+    """A trade dict with every journal column, typed like the rows of `JournalStore.frame`"""
+    row = {name: trade.get(name) for name in COLUMNS}
+    for column in TIME_COLUMNS:
+        value = row[column]
+        if isinstance(value, str):
+            try:
+                value = datetime.strptime(value, TIME_FORMAT)
+            except ValueError:
+                value = None
+        row[column] = pd.NaT if value is None or pd.isna(value) else pd.Timestamp(value)
+    return row
+
+
+class JournalStore:
+    """
+    Trading journal in an SQLite database in WAL mode.
+
+    Every trade is one row, inserted or updated in its own short
+    transaction, so nothing is ever rewritten in full. WAL mode lets
+    readers continue while a trade is written, and the busy timeout makes
+    concurrent writers (the GUI and the engine, in threads or separate
+    processes) wait for each other instead of failing. Each thread gets its
+    own connection. Times are stored as sortable "YYYY-MM-DD HH:MM:SS" text.
+    """
+
+    def __init__(self, path, busy_timeout=10.0):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self.logger = setup_logger("journal_store")
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        # A connection inherited through fork must not be used by the child
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the write lock up front"""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def insert(self, trade):
+        """
+        Add a trade
+
+        Args:
+            trade (dict): Journal columns to set; "ID" is ignored and assigned
+
+        Returns:
+            int: ID of the new trade
+        """
+        return self.insert_many([trade])[0]
+
+    def insert_many(self, trades):
+        """Add several trades in one transaction and return their IDs"""
+        ids = []
+        with self._transaction() as db:
+            for trade in trades:
+                fields = {COLUMNS[k]: _to_db(v) for k, v in trade.items() if k in COLUMNS and k != "ID"}
+                cursor = db.execute(
+                    f"INSERT INTO trades ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                    list(fields.values())
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def update(self, trade_id, changes):
+        """
+        Change fields of one trade
+
+        Returns:
+            bool: False if there is no trade `trade_id`
+        """
+        fields = {COLUMNS[k]: _to_db(v) for k, v in changes.items() if k in COLUMNS and k != "ID"}
+        if not fields:
+            return self.get(trade_id) is not None
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE trades SET {', '.join(f'{c} = ?' for c in fields)} WHERE id = ?",
+                [*fields.values(), int(trade_id)]
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, trade_id):
+        """Remove a trade; returns False if it did not exist"""
+        with self._transaction() as db:
+            cursor = db.execute("DELETE FROM trades WHERE id = ?", (int(trade_id),))
+        return cursor.rowcount > 0
+
+    def get(self, trade_id):
+        """One trade as a journal dict, or None"""
+        frame = self.frame(where="id = ?", params=(int(trade_id),))
+        return frame.iloc[0].to_dict() if len(frame) else None
+
+    def data_version(self):
+        """
+        Counter that changes whenever another connection commits
+
+        Writes through this thread's connection do not change it, so a
+        reader can poll it to notice trades written by the engine or
+        another process.
+        """
+        return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def frame(self, where=None, params=()):
+        """
+        Trades as a DataFrame with the journal column names, ordered by ID
+
+        Args:
+            where (str): Optional SQL condition on the database columns
+            params (tuple): Parameters of `where`
+        """
+        select = ", ".join(f'{db} AS "{name}"' for name, db in COLUMNS.items())
+        query = f"SELECT {select} FROM trades" + (f" WHERE {where}" if where else "") + " ORDER BY id"
+        frame = pd.read_sql_query(query, self._connection(), params=params)
+        for column in TIME_COLUMNS:
+            frame[column] = pd.to_datetime(frame[column], format=TIME_FORMAT, errors="coerce")
+        return frame
+
+    def import_csv(self, csv_path):
+        """
+        Load an old trading_journal.csv, keeping its trade IDs
+
+        Returns:
+            int: Trades imported
+        """
+        with self._transaction() as db:
+            imported = self._insert_csv(db, csv_path)
+        self.logger.info(f"Imported {imported} trades from {csv_path}")
+        return imported
+
+    def import_legacy_csv(self, csv_path):
+        """
+        Import the old CSV journal the first time the database is used
+
+        Only an empty database imports it, and the check is recorded, so the
+        file is never read again: a later CSV export under the same name
+        would otherwise bring back trades deleted since.
+
+        Returns:
+            int: Trades imported
+        """
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'legacy_csv'").fetchone():
+                return 0
+            db.execute("INSERT INTO meta (key, value) VALUES ('legacy_csv', ?)", (str(csv_path),))
+            if db.execute("SELECT COUNT(*) FROM trades").fetchone()[0] or not os.path.exists(csv_path):
+                return 0
+            imported = self._insert_csv(db, csv_path)
+        self.logger.info(f"Imported {imported} trades from the legacy journal {csv_path}")
+        return imported
+
+    @staticmethod
+    def _insert_csv(db, csv_path):
+        journal = pd.read_csv(csv_path)
+        columns = [c for c in COLUMNS if c in journal.columns]
+        rows = [[_to_db(v) for v in row] for row in journal[columns].itertuples(index=False)]
+        db.executemany(
+            f"INSERT OR REPLACE INTO trades ({', '.join(COLUMNS[c] for c in columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            rows
+        )
+        return len(rows)
+
+    def export_csv(self, csv_path):
+        """Write the whole journal as CSV in the old trading_journal.csv layout"""
+        self.frame().to_csv(csv_path, index=False, date_format=TIME_FORMAT)
+
+    def export_excel(self, excel_path):
+        """Write the whole journal as an Excel sheet"""
+        self.frame().to_excel(excel_path, index=False)
+
+
+def get_journal_store():
+    """Return the process-wide journal stored at `data.journal` in config.yaml"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = load_config()
+            _store = JournalStore(config['data'].get('journal', "data/journal/trading_journal.db"))
+        return _store
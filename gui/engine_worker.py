@@ -0,0 +1,65 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from core.engine import MarketEngine
+
+
+class EngineWorker(QObject):
+    """
+    Runs a MarketEngine on its own QThread and reports back through signals.
+
+    The engine loop blocks for as long as it runs, so it never touches the
+    GUI thread: a fresh engine is created and started on the worker thread,
+    and its stage and cycle callbacks are emitted as signals, which Qt
+    delivers to slots on the GUI thread. `stop` only requests cancellation
+    and returns at once; `stopped` is emitted when the engine has shut down.
+    """
+
+    started = pyqtSignal()
+    stopped = pyqtSignal()
+    failed = pyqtSignal(str)
+    stage_changed = pyqtSignal(str, str)  # Stage name, message
+    cycle_finished = pyqtSignal(object, object)  # Opportunities, changes DataFrames
+
+    def __init__(self):
+        super().__init__()
+        self.engine = None
+        self._stop_requested = False
+        self._thread = QThread()
+        self._thread.setObjectName("MarketEngine")
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self._run)
+
+    def is_running(self):
+        return self._thread.isRunning()
+
+    def start(self):
+        """Start the engine thread; returns False if it is already running"""
+        if self._thread.isRunning():
+            return False
+        self._stop_requested = False
+        self._thread.start()
+        return True
+
+    @pyqtSlot()
+    def _run(self):
+        try:
+            self.engine = MarketEngine(on_stage=self.stage_changed.emit, on_cycle=self.cycle_finished.emit)
+            if not self._stop_requested:
+                self.started.emit()
+                self.engine.start()
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.engine = None
+            self._thread.quit()
+            self.stopped.emit()
+
+    def stop(self):
+        """Cancel the running fetch and end the engine loop without waiting for it"""
+        self._stop_requested = True
+        engine = self.engine
+        if engine is not None:
+            engine.stop()
+
+    def wait(self, msecs):
+        """Block until the engine thread has finished, at most `msecs` milliseconds"""
+        return self._thread.wait(msecs)
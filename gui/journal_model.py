@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractProxyModel, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+PRICE_COLUMNS = ("Buy Price", "Sell Price")
+
+
+def format_cell(column, value):
+    """Display text of one journal value"""
+    if value is None or pd.isna(value):
+        return ""
+    if isinstance(value, float):
+        if column in PRICE_COLUMNS:
+            return f"{value:.4f}"
+        if column == "Profit (%)":
+            return f"{value:.2f}%"
+    return str(value)
+
+
+class JournalTableModel(QAbstractTableModel):
+    """
+    Read-only table model over the column arrays of a journal DataFrame.
+
+    The model keeps one numpy array per column and formats and colours a
+    cell only when a view asks for it in `data()`, so only the visible
+    cells cost anything, however many trades the journal holds. Loading a
+    new frame is a single model reset. New trades go into spare capacity at
+    the end of the arrays, which doubles when full, and are announced with
+    `beginInsertRows`, so adding a trade costs amortized constant time.
+    """
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self._values = [np.empty(0, dtype=object) for _ in self.columns]
+        self._rows = 0
+        self._completed_color = QColor(0, 128, 0)  # Green
+        self._active_color = QColor(200, 120, 0)  # Orange
+
+    def set_frame(self, frame):
+        """Show `frame`, reading its columns as arrays"""
+        self.beginResetModel()
+        self._values = [
+            frame[column].to_numpy(dtype=object) if column in frame.columns
+            else np.full(len(frame), None, dtype=object)
+            for column in self.columns
+        ]
+        self._rows = len(frame)
+        self.endResetModel()
+
+    def append_rows(self, trades):
+        """Add journal dicts after the last row"""
+        if not trades:
+            return
+        first, last = self._rows, self._rows + len(trades) - 1
+        capacity = len(self._values[0]) if self._values else 0
+        if last >= capacity:
+            capacity = max(2 * capacity, last + 1, 64)
+            grown = []
+            for values in self._values:
+                column = np.full(capacity, None, dtype=object)
+                column[:self._rows] = values[:self._rows]
+                grown.append(column)
+            self._values = grown
+
+        self.beginInsertRows(QModelIndex(), first, last)
+        for position, column in enumerate(self.columns):
+            self._values[position][first:last + 1] = [trade.get(column) for trade in trades]
+        self._rows = last + 1
+        self.endInsertRows()
+
+    def set_row(self, row, trade):
+        """Replace the values of one row with a journal dict"""
+        for position, column in enumerate(self.columns):
+            self._values[position][row] = trade.get(column)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        value = self._values[index.column()][index.row()]
+        if role == Qt.DisplayRole:
+            return format_cell(column, value)
+        if role == Qt.ForegroundRole and column == "Status":
+            return self._completed_color if value == "Completed" else self._active_color
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section]
+        return None
+
+
+class RowSubsetProxy(QAbstractProxyModel):
+    """
+    View of a subset of source rows, in source order.
+
+    Filters compute the rows to show as one vectorized mask and hand them
+    over with `set_rows`, instead of the view asking a predicate per row.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = None  # Source rows shown, None for all
+        self._positions = None  # Source row -> proxy row, built on first use
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        model.dataChanged.connect(self._source_data_changed)
+        model.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._source_rows_inserted)
+
+    def set_rows(self, rows):
+        """Show only these source rows (ascending), or all rows for None"""
+        self.beginResetModel()
+        self._rows = None if rows is None else np.asarray(rows, dtype=np.int64)
+        self._positions = None
+        self.endResetModel()
+
+    def add_rows(self, rows):
+        """Also show these source rows, which all come after the rows shown now"""
+        if self._rows is None or not len(rows):
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows = np.concatenate([self._rows, np.asarray(rows, dtype=np.int64)])
+        self._positions = None
+        self.endInsertRows()
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        # Without a subset every source row is shown; rows of a subset are added with `add_rows`
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _source_rows_inserted(self, parent, first, last):
+        if self._rows is None:
+            self.endInsertRows()
+
+    def _source_reset(self):
+        # Rows past the end of the new source are dropped until the next set_rows
+        if self._rows is not None:
+            self._rows = self._rows[self._rows < self.sourceModel().rowCount()]
+        self._positions = None
+        self.endResetModel()
+
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        rows = self.rowCount()
+        if rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, self.columnCount() - 1), roles)
+
+    def source_row(self, row):
+        return int(row if self._rows is None else self._rows[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(proxy_index.row()), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._rows is None:
+            return self.index(source_index.row(), source_index.column())
+        if self._positions is None:
+            self._positions = np.full(self.sourceModel().rowCount(), -1, dtype=np.int64)
+            self._positions[self._rows] = np.arange(len(self._rows))
+        row = self._positions[source_index.row()]
+        return self.index(int(row), source_index.column()) if row >= 0 else QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        return None
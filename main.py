@@ -1,20 +1,25 @@
 import sys
-import os
 import random
 from datetime import datetime
+import numpy as np
 import pandas as pd
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QTableWidget, QTableWidgetItem, QPushButton, QLabel, QLineEdit, QComboBox,
+    QTableView, QAbstractItemView, QPushButton, QLabel, QLineEdit, QComboBox,
     QDialog, QFormLayout, QDialogButtonBox, QMessageBox, QTabWidget, QGroupBox,
     QScrollArea, QStatusBar, QHeaderView, QCalendarWidget, QTimeEdit
 )
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor, QIcon, QDoubleValidator, QIntValidator
+from PyQt5.QtGui import QIcon, QDoubleValidator, QIntValidator
 
-from core.engine import MarketEngine
+from gui.engine_worker import EngineWorker
+from gui.journal_model import JournalTableModel, RowSubsetProxy
+from core.journal_search import JournalSearchIndex
+from core.journal_stats import DAYS, PRODUCTS, STATUS, JournalAggregates
+from core.journal_store import get_journal_store, journal_row
 
 class TradingJournalApp(QMainWindow):
     def __init__(self):
@@ -27,12 +32,25 @@ class TradingJournalApp(QMainWindow):
             "ID", "Product", "Buy Price", "Quantity", "Buy Time",
             "Analysis Time", "Sell Price", "Sell Time", "Profit (%)", "Status"
         ]
-        self.data_file = "trading_journal.csv"
+        self.data_file = "trading_journal.csv"  # Legacy journal, imported once into the store
+        self.export_file = "trading_journal_export.csv"
+        self.store = get_journal_store()
+        self.store_version = None
         self.df = pd.DataFrame(columns=self.columns)
-        self.next_id = 1
-        
-        # Engine control
-        self.engine = MarketEngine()
+        self.aggregates = JournalAggregates()
+        self.search_index = JournalSearchIndex()
+        self.drawn = {STATUS: -1, PRODUCTS: -1, DAYS: -1}  # Aggregate versions on screen
+        self.chart_products = []
+        self.product_bars = None
+        self.profit_line = self.profit_fill = None
+        
+        # Engine control: the engine loop runs on its own thread
+        self.engine_worker = EngineWorker()
+        self.engine_worker.started.connect(self.on_engine_started)
+        self.engine_worker.stopped.connect(self.on_engine_stopped)
+        self.engine_worker.failed.connect(self.on_engine_failed)
+        self.engine_worker.stage_changed.connect(self.on_engine_stage)
+        self.engine_worker.cycle_finished.connect(self.on_engine_cycle)
         self.engine_running = False
         self.log_messages = []
         
@@ -44,7 +62,7 @@ class TradingJournalApp(QMainWindow):
         
         # Status bar updates
         self.status_timer = QTimer(self)
-        self.status_timer.timeout.connect(self.update_status_bar)
+        self.status_timer.timeout.connect(self.refresh_from_store)
         self.status_timer.start(5000)
         
     def create_ui(self):
@@ -127,7 +145,7 @@ class TradingJournalApp(QMainWindow):
         btn_sale.setStyleSheet("background-color: #50a05a; color: white;")
         btn_sale.clicked.connect(self.add_sale)
         
-        btn_save = QPushButton("Save CSV")
+        btn_save = QPushButton("Export CSV")
         btn_save.setIcon(QIcon.fromTheme("document-save"))
         btn_save.setStyleSheet("background-color: #4a6fa5; color: white;")
         btn_save.clicked.connect(self.save_csv)
@@ -151,14 +169,19 @@ class TradingJournalApp(QMainWindow):
         search_layout.addWidget(QLabel("Search:"))
         self.search_field = QLineEdit()
         self.search_field.setPlaceholderText("Search trades...")
-        self.search_field.textChanged.connect(self.search_records)
+        # Search once typing pauses instead of on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.apply_filters)
+        self.search_field.textChanged.connect(self.search_timer.start)
         search_layout.addWidget(self.search_field)
         
         filter_layout = QHBoxLayout()
         filter_layout.addWidget(QLabel("Status:"))
         self.status_filter = QComboBox()
         self.status_filter.addItems(["All", "Active", "Completed"])
-        self.status_filter.currentIndexChanged.connect(self.filter_records)
+        self.status_filter.currentIndexChanged.connect(self.apply_filters)
         filter_layout.addWidget(self.status_filter)
         
         trade_layout.addLayout(button_grid)
@@ -176,11 +199,15 @@ class TradingJournalApp(QMainWindow):
         table_group = QGroupBox("Trade History")
         table_layout = QVBoxLayout()
         
-        self.trade_table = QTableWidget()
-        self.trade_table.setColumnCount(len(self.columns))
-        self.trade_table.setHorizontalHeaderLabels(self.columns)
-        self.trade_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.trade_table.setSelectionMode(QTableWidget.SingleSelection)
+        # Virtualized view: cells are formatted only when they are shown
+        self.journal_model = JournalTableModel(self.columns, self)
+        self.journal_rows = RowSubsetProxy(self)
+        self.journal_rows.setSourceModel(self.journal_model)
+        
+        self.trade_table = QTableView()
+        self.trade_table.setModel(self.journal_rows)
+        self.trade_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.trade_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.trade_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.trade_table.verticalHeader().setVisible(False)
         
@@ -247,7 +274,7 @@ class TradingJournalApp(QMainWindow):
                 left: 10px;
                 padding: 0 3px;
             }
-            QTableWidget {
+            QTableView {
                 border: 1px solid #cccccc;
                 gridline-color: #dddddd;
             }
@@ -273,154 +300,182 @@ class TradingJournalApp(QMainWindow):
         self.log_area.setText("".join(self.log_messages[-20:]))
         
     def start_engine(self):
-        """Start the trading engine"""
-        if not self.engine_running:
-            self.engine.start()
-            self.engine_running = True
-            self.engine_status.setText("RUNNING")
-            self.engine_status.setStyleSheet("color: green; font-weight: bold;")
-            self.log_message("Engine started successfully")
-            
-            # Start simulated engine activity
-            self.engine_timer = QTimer(self)
-            self.engine_timer.timeout.connect(self.engine_activity)
-            self.engine_timer.start(2000)
+        """Start the trading engine on its worker thread"""
+        if self.engine_worker.start():
+            self.engine_status.setText("STARTING")
+            self.engine_status.setStyleSheet("color: #c87800; font-weight: bold;")
+            self.log_message("Engine starting...")
         else:
             self.log_message("Engine is already running")
     
     def stop_engine(self):
-        """Stop the trading engine"""
-        if self.engine_running:
-            self.engine.stop()
-            self.engine_running = False
-            self.engine_status.setText("STOPPED")
-            self.engine_status.setStyleSheet("color: red; font-weight: bold;")
-            self.log_message("Engine stopped successfully")
-            
-            if hasattr(self, 'engine_timer'):
-                self.engine_timer.stop()
+        """Cancel the running cycle; the status changes once the engine has shut down"""
+        if self.engine_worker.is_running():
+            self.engine_worker.stop()
+            self.engine_status.setText("STOPPING")
+            self.engine_status.setStyleSheet("color: #c87800; font-weight: bold;")
+            self.log_message("Stopping engine...")
         else:
             self.log_message("Engine is not running")
     
-    def engine_activity(self):
-        pass
+    def on_engine_started(self):
+        self.engine_running = True
+        self.engine_status.setText("RUNNING")
+        self.engine_status.setStyleSheet("color: green; font-weight: bold;")
+        self.log_message("Engine started successfully")
+    
+    def on_engine_stopped(self):
+        self.engine_running = False
+        self.engine_status.setText("STOPPED")
+        self.engine_status.setStyleSheet("color: red; font-weight: bold;")
+        self.log_message("Engine stopped")
+    
+    def on_engine_failed(self, error):
+        self.log_message(f"Engine error: {error}")
+    
+    def on_engine_stage(self, stage, message):
+        self.log_message(message)
+    
+    def on_engine_cycle(self, opportunities, changes):
+        """Summarize an analysis delivered by the engine thread"""
+        entered = int((changes["change"] == "enter").sum()) if not changes.empty else 0
+        left = len(changes) - entered
+        self.log_message(f"{len(opportunities)} opportunities ({entered} new, {left} gone)")
+    
+    def closeEvent(self, event):
+        # Let the engine close its connections and flush pending writes
+        if self.engine_worker.is_running():
+            self.engine_worker.stop()
+            self.engine_worker.wait(10000)
+        super().closeEvent(event)
     
     def add_auto_trade(self, product, price, quantity):
         pass
     
+    @property
+    def df(self):
+        """The journal frame; trades added since it was last read are concatenated in one batch"""
+        if self.pending:
+            added = pd.DataFrame(self.pending, columns=self.columns)
+            self.journal = pd.concat([self.journal, added], ignore_index=True) if len(self.journal) else added
+            self.pending = []
+        return self.journal
+    
+    @df.setter
+    def df(self, frame):
+        self.journal = frame
+        self.pending = []
+    
     def update_table(self):
-        self.trade_table.setRowCount(0)
+        self.journal_model.set_frame(self.df)
+        self.apply_filters()
+    
+    def apply_filters(self):
+        """Show the trades matching both the search text and the status filter"""
+        mask = np.ones(len(self.df), dtype=bool)
         
-        for _, row in self.df.iterrows():
-            row_pos = self.trade_table.rowCount()
-            self.trade_table.insertRow(row_pos)
-            
-            for col_idx, col_name in enumerate(self.columns):
-                if col_name in row:
-                    value = row[col_name]
-                    if pd.isna(value):
-                        item = QTableWidgetItem("")
-                    elif isinstance(value, float):
-                        if col_name in ["Buy Price", "Sell Price"]:
-                            item = QTableWidgetItem(f"{value:.4f}")
-                        elif col_name == "Profit (%)":
-                            item = QTableWidgetItem(f"{value:.2f}%")
-                        else:
-                            item = QTableWidgetItem(str(value))
-                    else:
-                        item = QTableWidgetItem(str(value))
-                else:
-                    item = QTableWidgetItem("")
-                
-                # Color status column
-                if col_name == "Status":
-                    if item.text() == "Completed":
-                        item.setForeground(QColor(0, 128, 0))  # Green
-                    else:
-                        item.setForeground(QColor(200, 120, 0))  # Orange
-                
-                self.trade_table.setItem(row_pos, col_idx, item)
+        status_filter = self.status_filter.currentText()
+        if status_filter != "All" and "Status" in self.df.columns:
+            mask &= (self.df["Status"] == status_filter).to_numpy()
+        
+        found = self.search_index.search(self.search_field.text())
+        if found is not None:
+            matches = np.zeros(len(self.df), dtype=bool)
+            matches[found] = True
+            mask &= matches
+        
+        # While a filter is set the view keeps a row subset, so new trades are checked by `append_trade`
+        filtering = status_filter != "All" or found is not None
+        self.journal_rows.set_rows(np.flatnonzero(mask) if filtering else None)
     
-    def update_charts(self):
-        # Clear previous figures
-        self.figure1.clear()
-        self.figure2.clear()
-        
-        if not self.df.empty:
-            # Only completed trades
-            if "Sell Price" in self.df.columns:
-                completed = self.df.dropna(subset=["Sell Price"])
-            else:
-                completed = pd.DataFrame()
-            
-            if not completed.empty:
-                # Set light theme colors for matplotlib
+    def matches_filters(self, row, trade):
+        """Whether a new trade at `row` passes the status filter and the search text"""
+        status_filter = self.status_filter.currentText()
+        if status_filter != "All" and trade["Status"] != status_filter:
+            return False
+        found = self.search_index.search(self.search_field.text())
+        return found is None or row in found
+    
+    def selected_row(self):
+        """Journal row of the selected trade, or None"""
+        selected = self.trade_table.selectionModel().selectedRows()
+        if not selected:
+            return None
+        return self.journal_rows.source_row(selected[0].row())
+    
+    def refresh_summary(self):
+        """Redraw the status bar and the charts whose aggregates changed since last drawn"""
+        version = self.aggregates.version
+        if version[STATUS] != self.drawn[STATUS]:
+            self.update_status_bar()
+        if version[PRODUCTS] != self.drawn[PRODUCTS]:
+            self.update_product_chart()
+        if version[DAYS] != self.drawn[DAYS]:
+            self.update_profit_chart()
+        self.drawn = dict(version)
+    
+    def update_product_chart(self):
+        """Profit by product; bar heights are updated in place while the products stay the same"""
+        products = sorted(self.aggregates.profit_by_product)
+        heights = [self.aggregates.profit_by_product[p] for p in products]
+        
+        if products and products == self.chart_products:
+            for bar, height in zip(self.product_bars, heights):
+                bar.set_height(height)
+            ax1 = self.figure1.axes[0]
+            ax1.relim()
+            ax1.autoscale_view()
+        else:
+            self.figure1.clear()
+            self.chart_products = products
+            self.product_bars = None
+            if products:
                 plt.style.use('default')
-                
-                # Create figure 1 - Profit by product
                 ax1 = self.figure1.add_subplot(111)
-                
-                completed["Profit (EUR)"] = (completed["Sell Price"] - completed["Buy Price"]) * completed["Quantity"]
-                profit_df = completed.groupby("Product")["Profit (EUR)"].sum()
-                
-                colors = plt.cm.viridis(range(len(profit_df)))
-                profit_df.plot(kind="bar", ax=ax1, color=colors)
+                colors = plt.cm.viridis(range(len(products)))
+                self.product_bars = ax1.bar(products, heights, color=colors)
                 ax1.set_title("Profit by Product", fontsize=14)
                 ax1.set_ylabel("EUR", fontsize=12)
                 ax1.tick_params(axis='x', rotation=45)
                 ax1.grid(True, linestyle='--', alpha=0.3, color='gray')
-                
-                # Create figure 2 - Cumulative profit
-                ax2 = self.figure2.add_subplot(111)
-                
-                if "Sell Time" in completed.columns:
-                    # Convert to datetime and ensure proper format
-                    try:
-                        completed["Sell Date"] = pd.to_datetime(completed["Sell Time"]).dt.date
-                        date_df = completed.groupby("Sell Date")["Profit (EUR)"].sum().cumsum()
-                        
-                        # Ensure dates are properly sorted
-                        date_df = date_df.sort_index()
-                        
-                        # Convert dates to matplotlib-compatible format
-                        dates = date_df.index
-                        values = date_df.values
-                        
-                        ax2.plot(dates, values, marker='o', linestyle='-', color='#6a4c93')
-                        ax2.fill_between(dates, values, alpha=0.2, color='#6a4c93')
-                        ax2.set_title("Cumulative Profit", fontsize=14)
-                        ax2.set_ylabel("EUR", fontsize=12)
-                        ax2.grid(True, linestyle='--', alpha=0.3, color='gray')
-                        
-                        # Format x-axis dates
-                        ax2.tick_params(axis='x', rotation=45)
-                        ax2.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m-%d'))
-                    except Exception as e:
-                        print(f"Error plotting cumulative profit: {e}")
-                
                 self.figure1.tight_layout()
-                self.figure2.tight_layout()
-                self.canvas1.draw()
-                self.canvas2.draw()
+        self.canvas1.draw_idle()
     
-    def update_status_bar(self):
-        total = len(self.df)
-        
-        # Safely handle active trades count
-        if not self.df.empty and "Status" in self.df.columns:
-            active = len(self.df[self.df["Status"] == "Active"])
-            completed = total - active
+    def update_profit_chart(self):
+        """Cumulative profit by sell day; the line and its fill are replaced on the existing axes"""
+        dates, values = self.aggregates.cumulative_profit()
+        
+        if not dates:
+            self.figure2.clear()
+            self.profit_line = self.profit_fill = None
+        elif self.profit_line is not None:
+            ax2 = self.figure2.axes[0]
+            self.profit_line.set_data(dates, values)
+            self.profit_fill.remove()
+            self.profit_fill = ax2.fill_between(dates, values, alpha=0.2, color='#6a4c93')
+            ax2.relim()
+            # The fill reaches down to zero but is not part of relim
+            ax2.update_datalim([(mdates.date2num(dates[0]), 0)])
+            ax2.autoscale_view()
         else:
-            active = 0
-            completed = 0
-        
-        # Calculate total profit
-        total_profit = 0
-        if not self.df.empty and "Sell Price" in self.df.columns and "Buy Price" in self.df.columns:
-            completed_deals = self.df.dropna(subset=["Sell Price"])
-            if not completed_deals.empty:
-                completed_deals["Profit (EUR)"] = (completed_deals["Sell Price"] - completed_deals["Buy Price"]) * completed_deals["Quantity"]
-                total_profit = completed_deals["Profit (EUR)"].sum()
+            ax2 = self.figure2.add_subplot(111)
+            self.profit_line, = ax2.plot(dates, values, marker='o', linestyle='-', color='#6a4c93')
+            self.profit_fill = ax2.fill_between(dates, values, alpha=0.2, color='#6a4c93')
+            ax2.set_title("Cumulative Profit", fontsize=14)
+            ax2.set_ylabel("EUR", fontsize=12)
+            ax2.grid(True, linestyle='--', alpha=0.3, color='gray')
+            
+            # Format x-axis dates
+            ax2.tick_params(axis='x', rotation=45)
+            ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+            self.figure2.tight_layout()
+        self.canvas2.draw_idle()
+    
+    def update_status_bar(self):
+        total = self.aggregates.trades
+        active = self.aggregates.active
+        completed = total - active
+        total_profit = self.aggregates.total_profit
         
         self.status_label.setText(f"Total Trades: {total} | Active: {active} | Completed: {completed}")
         
@@ -433,12 +488,11 @@ class TradingJournalApp(QMainWindow):
         self.edit_window(title="Add Trade", record_type="buy")
     
     def add_sale(self):
-        selected = self.trade_table.selectedItems()
-        if not selected:
+        row_idx = self.selected_row()
+        if row_idx is None:
             QMessageBox.information(self, "Select Trade", "Please select an active trade to add a sale")
             return
             
-        row_idx = self.trade_table.row(selected[0])
         status = self.df.iloc[row_idx]["Status"] if "Status" in self.df.columns else "Active"
         
         if status == "Completed":
@@ -448,27 +502,27 @@ class TradingJournalApp(QMainWindow):
         self.edit_window(title="Add Sale", row_idx=row_idx, record_type="sale")
     
     def edit_record(self):
-        selected = self.trade_table.selectedItems()
-        if not selected:
+        row_idx = self.selected_row()
+        if row_idx is None:
             return
             
-        row_idx = self.trade_table.row(selected[0])
         status = self.df.iloc[row_idx]["Status"] if "Status" in self.df.columns else "Active"
         record_type = "sale" if status == "Completed" else "buy"
         self.edit_window(title="Edit Trade", row_idx=row_idx, record_type=record_type)
     
     def delete_record(self):
-        selected = self.trade_table.selectedItems()
-        if not selected:
+        row_idx = self.selected_row()
+        if row_idx is None:
             return
             
-        row_idx = self.trade_table.row(selected[0])
         if self.confirm_action("Confirmation", "Delete selected trade?"):
+            trade = self.df.iloc[row_idx].to_dict()
+            self.store.delete(trade["ID"])
             self.df = self.df.drop(row_idx).reset_index(drop=True)
+            self.aggregates.apply(removed=[trade])
+            self.search_index.delete(row_idx)
             self.save_to_df()
             self.update_table()
-            self.update_charts()
-            self.update_status_bar()
     
     def edit_window(self, title, row_idx=None, record_type="buy"):
         dialog = QDialog(self)
@@ -487,7 +541,7 @@ class TradingJournalApp(QMainWindow):
         if is_edit:
             id_label = QLabel(str(self.df.iloc[row_idx]["ID"]))
         else:
-            id_label = QLabel(str(self.next_id))
+            id_label = QLabel("New")
         id_label.setStyleSheet("font-weight: bold;")
         form.addRow("ID:", id_label)
 
@@ -631,19 +685,20 @@ class TradingJournalApp(QMainWindow):
                     if data["Buy Price"] > 0:
                         data["Profit (%)"] = ((data["Sell Price"] - data["Buy Price"]) / data["Buy Price"]) * 100
 
-                # Update or add record
+                # Update or add record; the store assigns IDs of new trades
                 if is_edit:
-                    data["ID"] = self.df.iloc[row_idx]["ID"]
-                    self.df.iloc[row_idx] = data
+                    old = self.df.iloc[row_idx].to_dict()
+                    self.store.update(old["ID"], data)
+                    trade = journal_row({**data, "ID": old["ID"]})
+                    self.df.loc[row_idx, self.columns] = [trade[c] for c in self.columns]
+                    self.journal_model.set_row(row_idx, trade)
+                    self.aggregates.apply(removed=[old], added=[trade])
+                    self.search_index.update(row_idx, trade)
+                    self.apply_filters()
                 else:
-                    data["ID"] = self.next_id
-                    self.next_id += 1
-                    self.df = pd.concat([self.df, pd.DataFrame([data])], ignore_index=True)
+                    self.append_trade(self.store.insert(data), data)
 
                 self.save_to_df()
-                self.update_table()
-                self.update_charts()
-                self.update_status_bar()
                 
             except ValueError as e:
                 QMessageBox.warning(self, "Error", f"Invalid input: {str(e)}")
@@ -651,126 +706,65 @@ class TradingJournalApp(QMainWindow):
                 QMessageBox.critical(self, "Error", f"An unexpected error occurred: {str(e)}")
     
     def add_item_to_table(self, data):
-        self.df = pd.concat([self.df, pd.DataFrame([data])], ignore_index=True)
-        self.update_table()
+        self.append_trade(self.store.insert(data), data)
+        self.refresh_summary()
+    
+    def append_trade(self, trade_id, data):
+        """
+        Add a trade just inserted into the store to the end of the journal
+
+        The trade joins a pending batch that `df` concatenates when it is
+        next read, and is inserted into the table model without a reset.
+        """
+        trade = journal_row({**data, "ID": trade_id})
+        row = len(self.journal) + len(self.pending)
+        self.pending.append(trade)
+        self.journal_model.append_rows([trade])
+        self.aggregates.apply(added=[trade])
+        self.search_index.append(trade)
+        if self.matches_filters(row, trade):
+            self.journal_rows.add_rows([row])
+    
+    def refresh_from_store(self):
+        """Reload the journal if another connection (e.g. the engine) wrote trades"""
+        version = self.store.data_version()
+        if version != self.store_version:
+            self.store_version = version
+            self.df = self.store.frame()
+            self.aggregates.reset(self.df)
+            self.search_index.reset(self.df)
+            self.update_table()
+            self.refresh_summary()
     
     def save_to_df(self):
-        """Data is already in self.df"""
-        self.update_charts()
-        self.update_status_bar()
+        """Data is already in self.df and the aggregates"""
+        self.refresh_summary()
     
     def save_csv(self):
+        """Export the journal as CSV; trades are already saved in the store as they change"""
         try:
-            self.df.to_csv(self.data_file, index=False)
-            QMessageBox.information(self, "Saved", f"Data saved to {self.data_file}")
+            self.store.export_csv(self.export_file)
+            QMessageBox.information(self, "Saved", f"Data exported to {self.export_file}")
         except Exception as e:
             QMessageBox.critical(self, "Save Error", f"Failed to save data: {str(e)}")
     
     def export_excel(self):
         try:
-            excel_file = self.data_file.replace(".csv", ".xlsx")
-            self.df.to_excel(excel_file, index=False)
+            excel_file = self.export_file.replace(".csv", ".xlsx")
+            self.store.export_excel(excel_file)
             QMessageBox.information(self, "Export Complete", f"Data exported to {excel_file}")
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"Failed to export data: {str(e)}")
     
-    def search_records(self):
-        search_text = self.search_field.text().lower()
-        
-        if not search_text:
-            self.update_table()
-            return
-        
-        # Filter dataframe
-        filtered = self.df[
-            self.df["Product"].str.lower().str.contains(search_text) |
-            self.df["ID"].astype(str).str.contains(search_text)
-        ]
-        
-        # Update table with filtered results
-        self.trade_table.setRowCount(0)
-        
-        for _, row in filtered.iterrows():
-            row_pos = self.trade_table.rowCount()
-            self.trade_table.insertRow(row_pos)
-            
-            for col_idx, col_name in enumerate(self.columns):
-                if col_name in row:
-                    value = row[col_name]
-                    if pd.isna(value):
-                        item = QTableWidgetItem("")
-                    elif isinstance(value, float):
-                        if col_name in ["Buy Price", "Sell Price"]:
-                            item = QTableWidgetItem(f"{value:.4f}")
-                        elif col_name == "Profit (%)":
-                            item = QTableWidgetItem(f"{value:.2f}%")
-                        else:
-                            item = QTableWidgetItem(str(value))
-                    else:
-                        item = QTableWidgetItem(str(value))
-                else:
-                    item = QTableWidgetItem("")
-                
-                self.trade_table.setItem(row_pos, col_idx, item)
-
     def load_data(self):
         try:
-            if os.path.exists(self.data_file):
-                self.df = pd.read_csv(
-                    self.data_file, 
-                    parse_dates=["Buy Time", "Analysis Time", "Sell Time"],
-                    dtype={"ID": int, "Buy Price": float, "Quantity": int, 
-                           "Sell Price": float, "Profit (%)": float}
-                )
-                if not self.df.empty:
-                    self.next_id = self.df["ID"].max() + 1
-                self.update_table()
-                self.update_charts()
-            else:
-                self.df = pd.DataFrame(columns=self.columns)
+            # First start with the store: bring over the old CSV journal
+            self.store.import_legacy_csv(self.data_file)
+            self.refresh_from_store()
         except Exception as e:
             print(f"Loading error: {str(e)}")
             self.df = pd.DataFrame(columns=self.columns)
               
-    def filter_records(self):
-        status_filter = self.status_filter.currentText()
-        
-        if status_filter == "All":
-            self.update_table()
-            return
-        
-        # Filter dataframe
-        if status_filter == "Active":
-            filtered = self.df[self.df["Status"] == "Active"]
-        else:  # Completed
-            filtered = self.df[self.df["Status"] == "Completed"]
-        
-        # Update table with filtered results
-        self.trade_table.setRowCount(0)
-        
-        for _, row in filtered.iterrows():
-            row_pos = self.trade_table.rowCount()
-            self.trade_table.insertRow(row_pos)
-            
-            for col_idx, col_name in enumerate(self.columns):
-                if col_name in row:
-                    value = row[col_name]
-                    if pd.isna(value):
-                        item = QTableWidgetItem("")
-                    elif isinstance(value, float):
-                        if col_name in ["Buy Price", "Sell Price"]:
-                            item = QTableWidgetItem(f"{value:.4f}")
-                        elif col_name == "Profit (%)":
-                            item = QTableWidgetItem(f"{value:.2f}%")
-                        else:
-                            item = QTableWidgetItem(str(value))
-                    else:
-                        item = QTableWidgetItem(str(value))
-                else:
-                    item = QTableWidgetItem("")
-                
-                self.trade_table.setItem(row_pos, col_idx, item)
-    
     def confirm_action(self, title, message):
         reply = QMessageBox.question(
             self, title, message, 
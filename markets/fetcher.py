@@ -0,0 +1,100 @@
+import asyncio
+import time
+import aiohttp
+from utils.logger import setup_logger
+from utils.metrics import timed
+
+
+def create_session(config=None):
+    """
+    Create an aiohttp session backed by a pooled keep-alive connector
+
+    Args:
+        config (dict): Loaded config, reads the optional `http` section
+
+    Returns:
+        aiohttp.ClientSession: Session to share between market clients
+    """
+    http = (config or {}).get("http", {})
+    connector = aiohttp.TCPConnector(
+        limit=http.get("pool_size", 10),
+        keepalive_timeout=http.get("keepalive_timeout", 60)
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+class MarketFetcher:
+    """
+    Concurrent market fetches on a single event loop.
+
+    Every market runs as a task on the same loop and shares one pooled
+    session, so adding a market adds a coroutine rather than a thread.
+    Each fetch has its own timeout; a timed-out or cancelled fetch is
+    cancelled at its next await and its connection released.
+    """
+
+    def __init__(self, config=None):
+        self.config = config
+        self.logger = setup_logger("market_fetcher")
+        self._session = None
+        self._loop = None
+        self._current = None
+        self.fetched_at = {}  # Market name -> completion time of its last fetch
+
+    async def session(self):
+        """Return the shared session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = create_session(self.config)
+        return self._session
+
+    async def run(self, jobs):
+        """
+        Fetch all markets concurrently
+
+        Args:
+            jobs (dict): Market name -> (fetch, timeout), where `fetch` is a
+                coroutine function taking the shared session
+
+        Returns:
+            dict: Market name -> fetch result, or the exception it raised
+                (asyncio.TimeoutError when the market timed out)
+
+        Raises:
+            asyncio.CancelledError: If the run was cancelled with `cancel`
+        """
+        self._loop = asyncio.get_running_loop()
+        self._current = asyncio.current_task()
+        session = await self.session()
+
+        fetched_at = {}
+
+        async def fetch_one(name, fetch, timeout):
+            self.logger.info(f"Starting {name} data fetch...")
+            try:
+                with timed(f"fetch_{name.lower()}"):
+                    return await asyncio.wait_for(fetch(session), timeout)
+            finally:
+                fetched_at[name] = time.time()
+
+        names = list(jobs)
+        try:
+            outcomes = await asyncio.gather(
+                *(fetch_one(name, *jobs[name]) for name in names),
+                return_exceptions=True
+            )
+        finally:
+            self._current = None
+        self.fetched_at = fetched_at
+        return dict(zip(names, outcomes))
+
+    def cancel(self):
+        """Cancel the running fetch; safe to call from any thread"""
+        loop, task = self._loop, self._current
+        if loop is not None and task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    async def close(self):
+        """Close the shared session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
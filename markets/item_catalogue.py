@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.helpers import load_config
+from utils.logger import setup_logger
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r"\s+")
+_PIPE = re.compile(r"\s*\|\s*")
+
+
+def normalize_name(name):
+    """
+    Matching key for a market hash name
+
+    Markets differ in trademark signs, Unicode forms, spacing and case
+    ("StatTrak™ AK-47 | Redline" vs "StatTrak AK-47 |Redline"), so all of
+    those are folded away. The result is only used for matching, never shown.
+    """
+    name = name.replace("™", "")  # ™ before NFKC, which would turn it into "TM"
+    name = unicodedata.normalize("NFKC", name)
+    name = _PIPE.sub(" | ", name)
+    name = _WHITESPACE.sub(" ", name).strip()
+    return name.casefold()
+
+
+class ItemCatalogue:
+    """
+    Persistent mapping of market item names to integer item IDs.
+
+    Every name variant seen on any market is interned once: its normalized
+    key gets a stable ID and the first variant seen becomes the display name.
+    Lookups of known variants are a single vectorized hash-index probe over
+    the distinct names of a frame, so only new variants are normalized.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.logger = setup_logger("item_catalogue")
+        self._lock = threading.Lock()
+        self._key_ids = {}  # Normalized key -> item ID
+        self._names = []  # Item ID -> display name
+        self._variants = {}  # Raw variant -> item ID
+        self._variant_index = pd.Index([], dtype=object)
+        self._variant_ids = np.empty(0, dtype=np.int64)
+        self._order = None  # Item ID -> rank of its display name
+        self._dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self._names)
+
+    def ids(self, names):
+        """
+        Item IDs of an array of names, interning unseen ones
+
+        Args:
+            names: Sequence, pd.Series or pd.Categorical of market hash names
+
+        Returns:
+            np.ndarray: int64 item ID per name, -1 for missing names
+        """
+        codes, uniques = pd.factorize(pd.Series(names, copy=False), sort=False)
+        if len(uniques) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        with self._lock:
+            positions = self._variant_index.get_indexer(uniques)
+            missing = positions < 0
+            if missing.any():
+                for variant in uniques[missing]:
+                    self._intern(variant)
+                self._rebuild_index()
+                positions = self._variant_index.get_indexer(uniques)
+            unique_ids = self._variant_ids[positions]
+        ids = unique_ids[codes]
+        ids[codes < 0] = -1
+        return ids
+
+    def _intern(self, variant):
+        key = normalize_name(variant)
+        item_id = self._key_ids.get(key)
+        if item_id is None:
+            item_id = self._key_ids[key] = len(self._names)
+            self._names.append(variant.strip())
+            self._order = None
+        self._variants[variant] = item_id
+        self._dirty = True
+
+    def _rebuild_index(self):
+        self._variant_index = pd.Index(list(self._variants), dtype=object)
+        self._variant_ids = np.fromiter(self._variants.values(), dtype=np.int64, count=len(self._variants))
+
+    def names(self, ids):
+        """Display names of item IDs"""
+        return np.asarray(self._names, dtype=object)[ids]
+
+    def sort_order(self, ids):
+        """Indices that sort item IDs by display name, using integer ranks only"""
+        with self._lock:
+            if self._order is None or len(self._order) != len(self._names):
+                self._order = np.empty(len(self._names), dtype=np.int64)
+                self._order[np.argsort(np.asarray(self._names, dtype=object), kind="stable")] = \
+                    np.arange(len(self._names))
+            order = self._order
+        return np.argsort(order[ids], kind="stable")
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read item catalogue, starting empty: {str(e)}")
+            return
+        self._names = state["names"]
+        self._variants = {variant: int(item_id) for variant, item_id in state["variants"].items()}
+        self._key_ids = {normalize_name(name): i for i, name in enumerate(self._names)}
+        for variant, item_id in self._variants.items():
+            self._key_ids.setdefault(normalize_name(variant), item_id)
+        self._rebuild_index()
+
+    def save(self):
+        """Persist new items and variants, if there are any"""
+        with self._lock:
+            if not self._dirty:
+                return
+            state = {"names": list(self._names), "variants": dict(self._variants)}
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Item catalogue saved ({len(state['names'])} items, {len(state['variants'])} variants)")
+
+
+def get_item_catalogue():
+    """Return the process-wide item catalogue stored at `data.catalogue` in config.yaml"""
+    global _catalogue
+    with _catalogue_lock:
+        if _catalogue is None:
+            config = load_config()
+            _catalogue = ItemCatalogue(config['data'].get('catalogue', "data/catalogue/items.json"))
+        return _catalogue
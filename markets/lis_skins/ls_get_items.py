@@ -1,37 +1,69 @@
-import requests
+import aiohttp
+import asyncio
 import json
-from datetime import datetime
-from pathlib import Path
 import time
+from datetime import datetime
 from utils.helpers import load_config
 from utils.logger import setup_logger
+from utils.rate_limiter import get_rate_limiter
+from utils.metrics import BYTES_DOWNLOADED, STAGE_SECONDS, timed, record_rows
+from markets.fetcher import create_session
+from markets.snapshot_store import get_snapshot_store
+from markets.lis_skins.ls_stream import LisSkinsStreamParser, LisSkinsAggregator
+from markets.price_depth import PriceDepth
 
 class LisSkinsAPI:
-    _last_request_time = 0
-    _rate_limit_delay = 30  # Conservative rate limiting
+    rate_limit = "lis_skins_export"  # Endpoint key under rate_limits in config.yaml
+
+    # Validators and parsed result of the previous successful fetch
+    _etag = None
+    _last_modified = None
+    _last_update = None
+    _cached_data = None
+    _cached_stream = None
+    not_modified = False  # True when the last call returned the cached data
+    depth = None  # PriceDepth of the last export, kept when it is unchanged
+
+    @classmethod
+    def get_items(cls, save_file=True, filename_prefix="lis_skins", stream=False):
+        """
+        Blocking wrapper around `fetch_items` using a one-off session
+
+        Returns:
+            dict: API response data (pd.DataFrame of aggregates when
+            streaming) or None if error
+        """
+        async def run():
+            async with create_session(load_config()) as session:
+                return await cls.fetch_items(session, save_file, filename_prefix, stream)
+
+        return asyncio.run(run())
 
     @classmethod
-    def get_items(cls, save_file=True, filename_prefix="lis_skins"):
+    async def fetch_items(cls, session, save_file=True, filename_prefix="lis_skins", stream=False):
         """
         Fetch market data from Lis-Skins API with proper rate limiting
-        
+
         Args:
+            session (aiohttp.ClientSession): Shared session to download with
             save_file (bool): Save response to file
             filename_prefix (str): Prefix for saved files
-            
+            stream (bool): Parse the export in chunks and return per-name
+                aggregates instead of the full response
+
         Returns:
-            dict: API response data or None if error
+            dict: API response data (pd.DataFrame of aggregates when
+            streaming) or None if error. When the export is unchanged since
+            the previous call, the cached result is returned and
+            `not_modified` is set.
         """
         logger = setup_logger("lis_skins_api")
         config = load_config()
-        
-        # Rate limiting
-        elapsed = time.time() - cls._last_request_time
-        if elapsed < cls._rate_limit_delay:
-            wait_time = cls._rate_limit_delay - elapsed
-            logger.info(f"Rate limiting: waiting {wait_time:.1f} seconds")
-            time.sleep(wait_time)
-        
+        cls.not_modified = False
+
+        # Rate limiting (shared token bucket, waits only when out of budget)
+        await get_rate_limiter(cls.rate_limit).acquire_async()
+
         try:
             # Prepare request
             api_url = "https://lis-skins.com/market_export_json/api_csgo_full.json"
@@ -39,42 +71,56 @@ class LisSkinsAPI:
                 "Accept": "application/json",
                 "User-Agent": "Mozilla/5.0 (compatible; LisSkinsAPI/1.0)"
             }
-            
+            has_cache = cls._cached_data is not None and cls._cached_stream == stream
+            if has_cache:
+                # Conditional request against the previous export
+                if cls._etag:
+                    headers["If-None-Match"] = cls._etag
+                if cls._last_modified:
+                    headers["If-Modified-Since"] = cls._last_modified
+
             # Make request
-            cls._last_request_time = time.time()
             logger.info("Downloading data from Lis-Skins...")
-            response = requests.get(api_url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            # Process response
-            data = response.json()
-            
+            if stream:
+                return await cls._fetch_items_stream(
+                    session, api_url, headers, config, logger, save_file, filename_prefix, has_cache
+                )
+
+            async with session.get(api_url, headers=headers) as response:
+                if response.status == 304 and has_cache:
+                    return cls._use_cache(logger, "HTTP 304")
+                response.raise_for_status()
+                body = await response.read()
+
+            BYTES_DOWNLOADED.inc(len(body), market="lis_skins")
+            # Process response; parsing runs in a thread so the loop keeps serving
+            # timeouts, cancellation and the other markets
+            with timed("parse_lis_skins"):
+                data = await asyncio.to_thread(json.loads, body)
+
             if data.get("status") != "success":
                 raise ValueError(f"API returned error status: {data.get('status')}")
-            
+
+            if has_cache and data["last_update"] == cls._last_update:
+                cls._remember(response, data["last_update"], cls._cached_data, stream)
+                return cls._use_cache(logger, f"last_update {cls._last_update}")
+
             # Add timestamp metadata
             update_timestamp = data["last_update"]
             update_date = datetime.utcfromtimestamp(update_timestamp).strftime("%Y-%m-%d")
             data["update_date"] = update_date
             logger.info(f"Data successfully received (update: {update_date})")
-            
-            # Save to file if requested
+
+            # Save snapshot in the background if requested
+            record_rows("lis_skins_listings", len(data["items"]))
+            cls.depth = await asyncio.to_thread(cls._listing_depth, data["items"])
             if save_file:
-                save_folder = Path(config['data']['raw']['lis_skins'])
-                save_folder.mkdir(parents=True, exist_ok=True)
-                
-                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                filename = f"{filename_prefix}_{timestamp}.json"
-                full_path = save_folder / filename
-                
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Raw data saved to {full_path}")
-            
+                get_snapshot_store().write_async("lis_skins", data["items"], prefix=filename_prefix)
+
+            cls._remember(response, update_timestamp, data, stream)
             return data
-            
-        except requests.exceptions.RequestException as e:
+
+        except aiohttp.ClientError as e:
             logger.error(f"API request failed: {str(e)}")
         except json.JSONDecodeError as e:
             logger.error(f"Failed to decode JSON response: {str(e)}")
@@ -82,6 +128,92 @@ class LisSkinsAPI:
             logger.error(f"Data validation error: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
-        
+
         return None
 
+    @staticmethod
+    def _listing_depth(items):
+        return PriceDepth.from_listings(
+            [item.get("name") for item in items],
+            [item.get("price") for item in items]
+        )
+
+    @classmethod
+    def _remember(cls, response, last_update, data, stream):
+        """Store validators and the parsed result for the next conditional request"""
+        cls._etag = response.headers.get("ETag")
+        cls._last_modified = response.headers.get("Last-Modified")
+        cls._last_update = last_update
+        cls._cached_data = data
+        cls._cached_stream = stream
+
+    @classmethod
+    def _use_cache(cls, logger, reason):
+        """Return the cached result of the previous fetch"""
+        cls.not_modified = True
+        logger.info(f"Lis-Skins data unchanged ({reason}), using cached data")
+        return cls._cached_data
+
+    @classmethod
+    async def _fetch_items_stream(cls, session, api_url, headers, config, logger, save_file,
+                                  filename_prefix, has_cache=False):
+        """
+        Download the export in chunks, aggregating listings as they arrive
+
+        Each chunk is parsed in a worker thread while the loop stays free;
+        the parser is only ever used by one thread at a time.
+        """
+        chunk_size = config.get('lis_skins', {}).get('chunk_size', 65536)
+        aggregator = LisSkinsAggregator()
+        parser = LisSkinsStreamParser(aggregator.add)
+
+        def same_export():
+            return has_cache and parser.meta.get("last_update") == cls._last_update
+
+        unchanged = None
+        parse_seconds = 0.0
+        async with session.get(api_url, headers=headers) as response:
+            if response.status == 304 and has_cache:
+                unchanged = "HTTP 304"
+            else:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    BYTES_DOWNLOADED.inc(len(chunk), market="lis_skins")
+                    start = time.perf_counter()
+                    await asyncio.to_thread(parser.feed, chunk)
+                    parse_seconds += time.perf_counter() - start
+                    # Stop reading as soon as the export turns out to be the same one
+                    if same_export():
+                        break
+                else:
+                    await asyncio.to_thread(parser.close)
+                # `last_update` may only arrive after the items, so check again at the end
+                if same_export():
+                    unchanged = f"last_update {cls._last_update}"
+                    cls._remember(response, cls._last_update, cls._cached_data, True)
+        # Parsing is interleaved with the download, only the parser's share is counted
+        STAGE_SECONDS.observe(parse_seconds, stage="parse_lis_skins")
+
+        if unchanged:
+            return cls._use_cache(logger, unchanged)
+
+        meta = parser.meta
+        if meta.get("status") != "success":
+            raise ValueError(f"API returned error status: {meta.get('status')}")
+
+        update_timestamp = meta["last_update"]
+        update_date = datetime.utcfromtimestamp(update_timestamp).strftime("%Y-%m-%d")
+
+        prices, cls.depth = await asyncio.to_thread(lambda: (aggregator.to_frame(), aggregator.depth()))
+        record_rows("lis_skins_listings", parser.item_count)
+        record_rows("lis_skins_items", len(prices))
+        prices.attrs["last_update"] = update_timestamp
+        prices.attrs["update_date"] = update_date
+        cls._remember(response, update_timestamp, prices, True)
+        if save_file:
+            get_snapshot_store().write_async("lis_skins", aggregator.listings(), prefix=filename_prefix)
+        logger.info(
+            f"Streamed {parser.item_count} listings into {len(prices)} items "
+            f"(update: {update_date})"
+        )
+        return prices
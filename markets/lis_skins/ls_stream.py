@@ -0,0 +1,196 @@
+import codecs
+import json
+from array import array
+import numpy as np
+import pandas as pd
+from markets.price_depth import PriceDepth
+
+_WHITESPACE = " \t\n\r"
+
+
+class LisSkinsStreamParser:
+    """
+    Incremental parser for the Lis-Skins full export.
+
+    Raw response chunks are pushed in with `feed`. Every listing of the
+    top-level "items" array is handed to `on_item` as soon as it is complete,
+    so the full body is never held in memory. All other top-level keys
+    (status, last_update, ...) are collected into `meta`.
+    """
+
+    def __init__(self, on_item, encoding="utf-8"):
+        self.on_item = on_item
+        self.meta = {}
+        self.item_count = 0
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+
+    def feed(self, chunk):
+        """Parse as much of the buffered document as possible"""
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        self._parse(final=False)
+
+    def close(self):
+        """Flush the remaining buffer and check the document is complete"""
+        self._buf = self._buf[self._pos:] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._parse(final=True)
+        if self._state != "done":
+            raise json.JSONDecodeError("Unexpected end of Lis-Skins export", self._buf, self._pos)
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self._buf)
+
+    def _expect(self, *tokens):
+        char = self._buf[self._pos]
+        if char not in tokens:
+            raise json.JSONDecodeError(f"Expected one of {tokens!r}", self._buf, self._pos)
+        self._pos += 1
+        return char
+
+    def _decode_value(self, final):
+        """Decode the next JSON value, or return (None, False) if it is incomplete"""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None, False
+        # A number touching the end of the buffer may continue in the next chunk
+        if end == len(self._buf) and not final:
+            return None, False
+        self._pos = end
+        return value, True
+
+    def _parse(self, final):
+        while self._state != "done" and self._skip_whitespace():
+            if self._state == "start":
+                self._expect("{")
+                self._state = "key"
+            elif self._state == "key":
+                if self._buf[self._pos] == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                key, complete = self._decode_value(final)
+                if not complete:
+                    return
+                self._key = key
+                self._state = "colon"
+            elif self._state == "colon":
+                self._expect(":")
+                self._state = "items" if self._key == "items" else "value"
+            elif self._state == "value":
+                value, complete = self._decode_value(final)
+                if not complete:
+                    return
+                self.meta[self._key] = value
+                self._state = "next_key"
+            elif self._state == "next_key":
+                self._state = "key" if self._expect(",", "}") == "," else "done"
+            elif self._state == "items":
+                self._expect("[")
+                self._state = "item"
+            elif self._state == "item":
+                if self._buf[self._pos] == "]":
+                    self._pos += 1
+                    self._state = "next_key"
+                    continue
+                item, complete = self._decode_value(final)
+                if not complete:
+                    return
+                self.item_count += 1
+                self.on_item(item)
+                self._state = "next_item"
+            elif self._state == "next_item":
+                self._state = "item" if self._expect(",", "]") == "," else "next_key"
+
+
+class LisSkinsAggregator:
+    """
+    Per-name price aggregates filled listing by listing.
+
+    Only a name code and a price are kept per listing in flat typed arrays,
+    which is a small fraction of the per-listing dicts produced by
+    `response.json()`.
+    """
+
+    def __init__(self):
+        self._codes = {}
+        self._names = []
+        self._listing_codes = array("q")
+        self._prices = array("d")
+        self._sorted = None
+
+    def __len__(self):
+        return len(self._prices)
+
+    def add(self, item):
+        """Add a single Lis-Skins listing"""
+        name = item.get("name")
+        price = item.get("price")
+        if name is None or price is None:
+            return
+        name = name.strip()
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+        self._listing_codes.append(code)
+        self._prices.append(float(price))
+
+    def listings(self):
+        """Per-listing name and price columns, with names as a categorical"""
+        codes = np.frombuffer(self._listing_codes, dtype=np.int64)
+        return pd.DataFrame({
+            "name": pd.Categorical.from_codes(codes, categories=self._names),
+            "price": np.frombuffer(self._prices, dtype=np.float64),
+        })
+
+    def _sorted_runs(self):
+        """Prices sorted by name code, then price, with the listing count of each name"""
+        codes = np.frombuffer(self._listing_codes, dtype=np.int64)
+        prices = np.frombuffer(self._prices, dtype=np.float64)
+        if self._sorted is None or self._sorted[0] != len(prices):
+            order = np.lexsort((prices, codes))
+            counts = np.bincount(codes, minlength=len(self._names))
+            self._sorted = (len(prices), prices[order], counts)
+        return self._sorted[1:]
+
+    def depth(self):
+        """Sorted per-name listing prices, see `PriceDepth`"""
+        sorted_prices, counts = self._sorted_runs()
+        return PriceDepth.from_sorted(self._names, sorted_prices, counts)
+
+    def to_frame(self):
+        """
+        Build the same frame as `calculate_lis_skins_prices`
+
+        Returns:
+            pd.DataFrame: name, ls_min_price, ls_median_price, ls_quantity
+        """
+        columns = ["name", "ls_min_price", "ls_median_price", "ls_quantity"]
+        if not self._prices:
+            return pd.DataFrame(columns=columns)
+
+        # Listings sorted by name code, then price, so each name is a sorted run
+        sorted_prices, counts = self._sorted_runs()
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        lower = sorted_prices[starts + (counts - 1) // 2]
+        upper = sorted_prices[starts + counts // 2]
+
+        frame = pd.DataFrame({
+            "name": self._names,
+            "ls_min_price": sorted_prices[starts],
+            "ls_median_price": (lower + upper) / 2,
+            "ls_quantity": counts,
+        }, columns=columns)
+        return frame.sort_values("name", ignore_index=True)
@@ -1,8 +1,9 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from pathlib import Path
-from utils.helpers import load_config
 from utils.logger import setup_logger
+from utils.metrics import timed, record_rows
+from markets.price_history import get_price_history
+from markets.item_catalogue import get_item_catalogue
 
 def calculate_lis_skins_prices(items):
     """Calculate median prices for Lis-Skins items grouped by name"""
@@ -33,49 +34,176 @@ def prepare_skinport_data(items):
     
     return sp_df
 
-def merge_markets(ls_items, sp_items):
+PRICE_COLUMNS = [
+    'ls_min_price', 'ls_median_price', 'ls_quantity',
+    'sp_min_price', 'sp_suggested_price', 'sp_quantity'
+]
+
+class MergeState:
+    """
+    Merged prices of previous cycles, indexed by item ID.
+    
+    `update` diffs a new join against the stored prices and recomputes the
+    derived columns only for items whose prices moved. IDs of changed and
+    vanished items accumulate until a consumer (the analyzer) collects them
+    with `take_changes`, so it can update its own per-item state likewise.
+    """
+    
+    def __init__(self):
+        self.prices = np.empty((0, len(PRICE_COLUMNS)))
+        self.derived = np.empty((0, 2))  # price_diff, price_ratio
+        self.present = np.zeros(0, dtype=bool)
+        self._pending = np.zeros(0, dtype=bool)
+    
+    def _grow(self, size):
+        extra = size - len(self.present)
+        if extra <= 0:
+            return
+        self.prices = np.vstack([self.prices, np.full((extra, self.prices.shape[1]), np.nan)])
+        self.derived = np.vstack([self.derived, np.full((extra, self.derived.shape[1]), np.nan)])
+        self.present = np.concatenate([self.present, np.zeros(extra, dtype=bool)])
+        self._pending = np.concatenate([self._pending, np.zeros(extra, dtype=bool)])
+    
+    def update(self, item_ids, prices):
+        """
+        Store the prices of a new join
+        
+        Args:
+            item_ids (np.ndarray): Item IDs of the joined rows
+            prices (np.ndarray): (rows x PRICE_COLUMNS) prices of those rows
+            
+        Returns:
+            tuple: (rows x 2) price_diff/price_ratio of the rows, number of
+                changed items, number of items that disappeared
+        """
+        self._grow(item_ids.max() + 1 if len(item_ids) else 0)
+        
+        old = self.prices[item_ids]
+        unchanged = ((old == prices) | (np.isnan(old) & np.isnan(prices))).all(axis=1)
+        moved = ~unchanged | ~self.present[item_ids]
+        changed = item_ids[moved]
+        new_prices = prices[moved]
+        
+        self.prices[changed] = new_prices
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.derived[changed, 0] = new_prices[:, 3] - new_prices[:, 0]
+            self.derived[changed, 1] = new_prices[:, 3] / new_prices[:, 0]
+        
+        present = np.zeros(len(self.present), dtype=bool)
+        present[item_ids] = True
+        removed = self.present & ~present
+        self.prices[removed] = np.nan
+        self.derived[removed] = np.nan
+        self.present = present
+        
+        self._pending[changed] = True
+        self._pending[removed] = True
+        return self.derived[item_ids], len(changed), int(removed.sum())
+    
+    def take_changes(self):
+        """Item IDs changed or removed since the previous call"""
+        changed = np.flatnonzero(self._pending)
+        self._pending[:] = False
+        return changed
+
+def _index_by_item(frame, item_ids, size):
     """
-    Merge data from both markets and save as parquet
+    Row of `frame` for every item ID (-1 where the market has no row)
+
+    Names that normalize to the same item keep the row with the most listings.
+    """
+    quantity_column = 'ls_quantity' if 'ls_quantity' in frame.columns else 'sp_quantity'
+    quantity = frame[quantity_column].fillna(0).to_numpy(dtype=float)
+    rows = np.flatnonzero(item_ids >= 0)
+    # Ascending quantity: the largest duplicate is written last and wins
+    rows = rows[np.argsort(quantity[rows], kind='stable')]
+    positions = np.full(size, -1, dtype=np.int64)
+    positions[item_ids[rows]] = rows
+    return positions, len(rows) - np.count_nonzero(positions >= 0)
+
+def _take(frame, positions, columns):
+    """Gather `columns` of `frame` at `positions`, NaN where a position is -1"""
+    present = positions >= 0
+    result = {}
+    for column in columns:
+        values = np.full(len(positions), np.nan)
+        values[present] = frame[column].to_numpy(dtype=float)[positions[present]]
+        result[column] = values
+    return result
+
+def merge_markets(ls_items, sp_items, state=None):
+    """
+    Merge data from both markets and append them to the price history
+    
+    Names of both markets are mapped to item IDs through the item catalogue,
+    which also matches spelling variants of the same item. The outer join is
+    then done by indexing per-market row arrays with those integer IDs.
     
     Args:
-        ls_items: Lis-Skins API response
+        ls_items: Lis-Skins API response, or its per-name aggregates
+            when fetched in streaming mode
         sp_items: Skinport API response
+        state (MergeState): Previous merge; when given, derived columns are
+            only recomputed for items whose prices changed
         
     Returns:
-        pd.DataFrame: Merged dataframe with market comparison
+        pd.DataFrame: Merged dataframe with market comparison, ordered by name
     """
     logger = setup_logger("market_merger")
-    config = load_config()
     
     try:
-        # Process Lis-Skins data
-        ls_processed = calculate_lis_skins_prices(ls_items)
+        # Process Lis-Skins data (streamed exports arrive already aggregated)
+        if isinstance(ls_items, pd.DataFrame):
+            ls_processed = ls_items
+        else:
+            ls_processed = calculate_lis_skins_prices(ls_items)
         
         # Process Skinport data
         sp_processed = prepare_skinport_data(sp_items)
         
         # Merge datasets
-        merged = pd.merge(
-            ls_processed,
-            sp_processed,
-            on='name',
-            how='outer'
-        )
-        
-        # Calculate price differences
-        merged['price_diff'] = merged['sp_min_price'] - merged['ls_min_price']
-        merged['price_ratio'] = merged['sp_min_price'] / merged['ls_min_price']
-        
-        # Save to parquet
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        save_path = Path(config['data']['combined']) / f"merged_markets_{timestamp}.parquet"
-        save_path.parent.mkdir(parents=True, exist_ok=True)
+        with timed("merge"):
+            catalogue = get_item_catalogue()
+            ls_ids = catalogue.ids(ls_processed['name'])
+            sp_ids = catalogue.ids(sp_processed['name'])
+            
+            size = len(catalogue)
+            ls_positions, ls_duplicates = _index_by_item(ls_processed, ls_ids, size)
+            sp_positions, sp_duplicates = _index_by_item(sp_processed, sp_ids, size)
+            if ls_duplicates or sp_duplicates:
+                logger.info(
+                    f"Folded name variants: {ls_duplicates} Lis-Skins, {sp_duplicates} Skinport rows"
+                )
+            
+            item_ids = np.flatnonzero((ls_positions >= 0) | (sp_positions >= 0))
+            item_ids = item_ids[catalogue.sort_order(item_ids)]
+            
+            merged = pd.DataFrame({
+                'name': catalogue.names(item_ids),
+                **_take(ls_processed, ls_positions[item_ids], PRICE_COLUMNS[:3]),
+                **_take(sp_processed, sp_positions[item_ids], PRICE_COLUMNS[3:]),
+            })
+            
+            # Calculate price differences
+            if state is None:
+                merged['price_diff'] = merged['sp_min_price'] - merged['ls_min_price']
+                merged['price_ratio'] = merged['sp_min_price'] / merged['ls_min_price']
+            else:
+                derived, changed, removed = state.update(item_ids, merged[PRICE_COLUMNS].to_numpy())
+                merged['price_diff'] = derived[:, 0]
+                merged['price_ratio'] = derived[:, 1]
+                logger.info(f"{changed} items changed, {removed} items gone since the previous merge")
+            merged['item_id'] = item_ids
+        record_rows("merge", len(merged))
+        catalogue.save()
         
-        merged.to_parquet(save_path)
-        logger.info(f"Saved merged market data to {save_path}")
+        # Append to the price history dataset
+        with timed("history_append"):
+            save_path = get_price_history().append(merged)
+        logger.info(f"Appended merged market data to {save_path}")
         
         return merged
         
     except Exception as e:
         logger.error(f"Failed to merge markets: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+class PriceDepth:
+    """
+    Ask-side depth of every item in one flat sorted buffer.
+
+    The listing prices of item `i` are `prices[offsets[i]:offsets[i + 1]]`,
+    sorted ascending, so buying `k` units of an item costs the sum of the
+    first `k` prices of its run. Queries work on many items at once by
+    expanding their runs into one segmented array, which keeps them
+    vectorized even over 500k+ listings.
+    """
+
+    def __init__(self, names, prices, offsets):
+        self.names = list(names)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._run_of = None  # Item ID -> run, filled by `runs_for`
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_sorted(cls, names, sorted_prices, counts):
+        """Build from prices already sorted by name run, then by price"""
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(names, sorted_prices, offsets)
+
+    @classmethod
+    def from_listings(cls, names, prices):
+        """Build from unsorted per-listing name and price arrays"""
+        codes, uniques = pd.factorize(pd.Series(names, copy=False).str.strip())
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = (codes >= 0) & ~np.isnan(prices)
+        codes, prices = codes[valid], prices[valid]
+        order = np.lexsort((prices, codes))
+        return cls.from_sorted(uniques, prices[order], np.bincount(codes, minlength=len(uniques)))
+
+    def runs_for(self, item_ids, catalogue):
+        """
+        Run index of each item ID, -1 for items without listings
+
+        Args:
+            item_ids (np.ndarray): Catalogue item IDs
+            catalogue (ItemCatalogue): Catalogue the IDs come from
+        """
+        if self._run_of is None or len(self._run_of) < len(catalogue):
+            depth_ids = catalogue.ids(self.names)
+            self._run_of = np.full(len(catalogue), -1, dtype=np.int64)
+            self._run_of[depth_ids[depth_ids >= 0]] = np.flatnonzero(depth_ids >= 0)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        runs = np.full(len(item_ids), -1, dtype=np.int64)
+        known = (item_ids >= 0) & (item_ids < len(self._run_of))
+        runs[known] = self._run_of[item_ids[known]]
+        return runs
+
+    def fill(self, runs, max_price, budget):
+        """
+        Buy the cheapest units of each run while they stay profitable and affordable
+
+        Units are taken in price order as long as the unit price is at most
+        `max_price` and the running cost stays within `budget`.
+
+        Args:
+            runs (np.ndarray): Run per item (-1 buys nothing)
+            max_price (np.ndarray): Highest acceptable unit price per item
+            budget (np.ndarray): Spending limit per item
+
+        Returns:
+            tuple: (units, cost, last unit price) per item; the last price
+                is NaN when no unit is bought
+        """
+        runs = np.asarray(runs, dtype=np.int64)
+        n = len(runs)
+        has_run = runs >= 0
+        starts = np.where(has_run, self.offsets[np.maximum(runs, 0)], 0)
+        lengths = np.where(has_run, self.offsets[np.maximum(runs, 0) + 1] - starts, 0)
+
+        # Expand the runs into one segmented array of listing positions
+        segment = np.repeat(np.arange(n), lengths)
+        first = np.cumsum(lengths) - lengths
+        positions = starts[segment] + np.arange(lengths.sum()) - first[segment]
+        prices = self.prices[positions]
+
+        running_cost = np.cumsum(prices)
+        running_cost -= np.repeat(_segment_base(running_cost, first, lengths), lengths)
+        take = (prices <= np.repeat(max_price, lengths)) & (running_cost <= np.repeat(budget, lengths))
+
+        units = np.bincount(segment, weights=take, minlength=n).astype(np.int64)
+        cost = np.bincount(segment, weights=prices * take, minlength=n)
+        last_price = np.full(n, np.nan)
+        bought = units > 0
+        last_price[bought] = self.prices[starts[bought] + units[bought] - 1]
+        return units, cost, last_price
+
+    def unit_prices(self, runs, units):
+        """
+        Prices of the first `units` listings of each run
+
+        Returns:
+            tuple: (item index, unit price) arrays, cheapest first per item
+        """
+        runs = np.asarray(runs, dtype=np.int64)
+        units = np.where(runs >= 0, np.asarray(units, dtype=np.int64), 0)
+        starts = self.offsets[np.maximum(runs, 0)]
+        segment = np.repeat(np.arange(len(runs)), units)
+        first = np.cumsum(units) - units
+        positions = starts[segment] + np.arange(units.sum()) - first[segment]
+        return segment, self.prices[positions]
+
+
+def _segment_base(running_cost, first, lengths):
+    """Cumulative cost before each segment starts, so the running cost restarts per segment"""
+    base = np.zeros(len(first))
+    nonempty = (first > 0) & (lengths > 0)
+    base[nonempty] = running_cost[first[nonempty] - 1]
+    return base
@@ -0,0 +1,268 @@
+import re
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from utils.helpers import load_config
+from utils.logger import setup_logger
+
+_history = None
+_history_lock = threading.Lock()
+
+HISTORY_SCHEMA = pa.schema([
+    ("snapshot_time", pa.timestamp("ms")),
+    ("name", pa.string()),
+    ("ls_min_price", pa.float64()),
+    ("ls_median_price", pa.float64()),
+    ("ls_quantity", pa.float64()),
+    ("sp_min_price", pa.float64()),
+    ("sp_suggested_price", pa.float64()),
+    ("sp_quantity", pa.float64()),
+    ("price_diff", pa.float64()),
+    ("price_ratio", pa.float64()),
+])
+
+# Both naming schemes used by the old per-cycle merged_markets_<timestamp>.parquet files
+_LEGACY_TIMESTAMPS = [
+    (re.compile(r"merged_markets_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.parquet$"), "%Y-%m-%d_%H-%M-%S"),
+    (re.compile(r"merged_markets_(\d{8}_\d{6})\.parquet$"), "%Y%m%d_%H%M%S"),
+]
+
+
+class PriceHistory:
+    """
+    Append-only history of merged market prices.
+
+    Every merge is appended as a part file under a `date=<YYYY-MM-DD>`
+    partition with a `snapshot_time` column. `compact` rewrites a day's
+    small parts into one file sorted by name and time, so that the Parquet
+    row-group statistics let `history` skip everything but the requested
+    item. Queries go through pyarrow.dataset with partition, predicate and
+    column pushdown.
+
+    Files in progress are hidden (leading "."), which pyarrow skips when
+    discovering the dataset, so readers never see a partial file. A
+    compacted day is built in a hidden sibling directory and swapped in by
+    directory renames; `recover` finishes or discards a swap that a crash
+    interrupted.
+    """
+
+    def __init__(self, root, row_group_size=65536):
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+        self.logger = setup_logger("price_history")
+
+    def append(self, merged_df, snapshot_time=None):
+        """
+        Append one merged snapshot
+
+        Args:
+            merged_df (pd.DataFrame): Output of `merge_markets`
+            snapshot_time (datetime): Time of the snapshot (default now)
+
+        Returns:
+            Path: Written part file
+        """
+        snapshot_time = snapshot_time or datetime.now()
+        table = self._to_table(merged_df, snapshot_time)
+
+        path = self.root / f"date={snapshot_time:%Y-%m-%d}" / f"part-{snapshot_time:%H%M%S%f}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._write(table, path)
+        return path
+
+    def _to_table(self, frame, snapshot_time):
+        columns = {}
+        for field in HISTORY_SCHEMA:
+            if field.name == "snapshot_time":
+                continue
+            values = frame[field.name] if field.name in frame.columns else None
+            columns[field.name] = pa.array(values, type=field.type, from_pandas=True) \
+                if values is not None else pa.nulls(len(frame), type=field.type)
+        columns["snapshot_time"] = pa.array(
+            [pd.Timestamp(snapshot_time)] * len(frame), type=pa.timestamp("ms")
+        )
+        return pa.table(columns).select(HISTORY_SCHEMA.names).cast(HISTORY_SCHEMA)
+
+    def _write(self, table, path):
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=self.row_group_size)
+        tmp_path.replace(path)
+
+    def partitions(self):
+        """Date partitions present in the dataset, oldest first"""
+        return sorted(p.name.split("=", 1)[1] for p in self.root.glob("date=*") if p.is_dir())
+
+    def compact(self, date=None, min_files=2):
+        """
+        Merge small part files of a day into one sorted file
+
+        Args:
+            date (str): `YYYY-MM-DD` partition to compact (default all
+                partitions except today's, which is still being appended to)
+            min_files (int): Leave partitions with fewer files alone
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        if date is None:
+            today = f"{datetime.now():%Y-%m-%d}"
+            dates = [d for d in self.partitions() if d != today]
+        else:
+            dates = [date]
+
+        compacted = 0
+        for day in dates:
+            folder = self.root / f"date={day}"
+            parts = sorted(folder.glob("*.parquet"))
+            if len(parts) < min_files:
+                continue
+
+            table = pa.concat_tables(pq.read_table(p, schema=HISTORY_SCHEMA) for p in parts)
+            table = table.sort_by([("name", "ascending"), ("snapshot_time", "ascending")])
+
+            # Build the new partition beside the old one, then swap the directories
+            building = self.root / f".date={day}.compacting"
+            shutil.rmtree(building, ignore_errors=True)
+            building.mkdir()
+            self._write(table, building / f"compacted-{datetime.now():%Y%m%d%H%M%S%f}.parquet")
+            (building / ".parts").write_text("\n".join(p.name for p in parts))
+            building.rename(self.root / f".date={day}.compacted")
+            self._swap(day)
+
+            compacted += 1
+            self.logger.info(f"Compacted {len(parts)} files of {day} ({table.num_rows} rows)")
+        return compacted
+
+    def _swap(self, day):
+        """
+        Put a built `.date=<day>.compacted` partition in place of `date=<day>`
+
+        Every step is a rename, so this can resume from wherever a crash
+        stopped it. Between the two renames the day is briefly missing from
+        queries, but its rows are never counted twice.
+        """
+        folder = self.root / f"date={day}"
+        ready = self.root / f".date={day}.compacted"
+        old = self.root / f".date={day}.old"
+        if ready.exists():
+            if folder.exists() and not old.exists():
+                folder.rename(old)
+            ready.rename(folder)
+        if old.exists():
+            # Parts appended while the day was being compacted move to the new partition
+            compacted = set((folder / ".parts").read_text().split())
+            for part in old.glob("*.parquet"):
+                if part.name not in compacted:
+                    part.replace(folder / part.name)
+            shutil.rmtree(old)
+
+    def recover(self):
+        """
+        Clean up after a crash: finish interrupted compactions and remove
+        unfinished builds and temporary files. Run it while no other process
+        writes to the history, e.g. when the engine starts.
+        """
+        if not self.root.exists():
+            return
+        for building in self.root.glob(".date=*.compacting"):
+            shutil.rmtree(building)
+        days = {
+            p.name[len(".date="):].rsplit(".", 1)[0]
+            for pattern in (".date=*.compacted", ".date=*.old") for p in self.root.glob(pattern)
+        }
+        for day in sorted(days):
+            self._swap(day)
+            self.logger.info(f"Finished the interrupted compaction of {day}")
+        for tmp_path in self.root.glob("date=*/.*.tmp"):
+            tmp_path.unlink()
+
+    def dataset(self):
+        """The history as a hive-partitioned pyarrow dataset"""
+        partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning)
+
+    def history(self, name=None, start=None, end=None, columns=None):
+        """
+        Load price history with partition, predicate and column pushdown
+
+        Args:
+            name (str or list): Item name(s) to load (default all items)
+            start (datetime): Inclusive lower bound on snapshot_time
+            end (datetime): Exclusive upper bound on snapshot_time
+            columns (list): Price columns to load besides snapshot_time and name
+
+        Returns:
+            pd.DataFrame: Matching rows ordered by name and snapshot_time
+        """
+        if not self.partitions():
+            return pd.DataFrame(columns=["snapshot_time", "name"] + list(columns or []))
+
+        # Partition filters prune whole days, the rest is pushed down to row groups
+        conditions = []
+        if name is not None:
+            names = [name] if isinstance(name, str) else list(name)
+            conditions.append(ds.field("name").isin(names))
+        if start is not None:
+            conditions.append(ds.field("date") >= f"{start:%Y-%m-%d}")
+            conditions.append(ds.field("snapshot_time") >= _timestamp(start))
+        if end is not None:
+            conditions.append(ds.field("date") <= f"{end:%Y-%m-%d}")
+            conditions.append(ds.field("snapshot_time") < _timestamp(end))
+
+        condition = None
+        for expression in conditions:
+            condition = expression if condition is None else condition & expression
+
+        selected = ["snapshot_time", "name"] + [
+            c for c in (columns or HISTORY_SCHEMA.names) if c not in ("snapshot_time", "name")
+        ]
+        table = self.dataset().to_table(columns=selected, filter=condition)
+        return table.to_pandas().sort_values(["name", "snapshot_time"], ignore_index=True)
+
+    def import_legacy(self, folder):
+        """
+        Import old per-cycle merged_markets_<timestamp>.parquet files
+
+        Args:
+            folder (Path): Folder holding the legacy files
+
+        Returns:
+            int: Number of files imported
+        """
+        imported = 0
+        for path in sorted(Path(folder).glob("merged_markets_*.parquet")):
+            snapshot_time = _legacy_timestamp(path.name)
+            if snapshot_time is None:
+                self.logger.warning(f"Skipping {path}: unrecognised timestamp")
+                continue
+            self.append(pd.read_parquet(path), snapshot_time)
+            imported += 1
+        self.logger.info(f"Imported {imported} legacy snapshots from {folder}")
+        return imported
+
+
+def _timestamp(value):
+    return pa.scalar(pd.Timestamp(value), type=pa.timestamp("ms"))
+
+
+def _legacy_timestamp(filename):
+    for pattern, fmt in _LEGACY_TIMESTAMPS:
+        match = pattern.search(filename)
+        if match:
+            return datetime.strptime(match.group(1), fmt)
+    return None
+
+
+def get_price_history():
+    """Return the process-wide price history rooted at `data.history` in config.yaml"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            config = load_config()
+            _history = PriceHistory(config['data'].get('history', "data/history"))
+        return _history
@@ -1,21 +1,46 @@
-import requests
-import datetime
+import aiohttp
+import asyncio
+import hashlib
 import json
-import os
-import time
 from utils.helpers import load_config
 from utils.logger import setup_logger
+from utils.rate_limiter import get_rate_limiter
+from utils.metrics import BYTES_DOWNLOADED, timed, record_rows
+from markets.fetcher import create_session
+from markets.snapshot_store import get_snapshot_store
 
 class SkinportAPI:
-    _last_request_time = 0
-    _rate_limit_delay = 38  # 5 minutes = 300 seconds / 8 requests = ~37.5s between requests
+    rate_limit = "skinport_items"  # Endpoint key under rate_limits in config.yaml
+
+    # Validators and parsed result of the previous successful fetch, per query
+    _validators = {}
+    _cached_data = {}
+    not_modified = False  # True when the last call returned the cached data
 
     @classmethod
     def get_items(cls, save_file=True, filename_prefix="sp_items", currency="EUR", tradable=False, app_id=730):
         """
+        Blocking wrapper around `fetch_items` using a one-off session
+        
+        Returns:
+            dict: API response data or None if error
+        """
+        async def run():
+            async with create_session(load_config()) as session:
+                return await cls.fetch_items(
+                    session, save_file, filename_prefix, currency, tradable, app_id
+                )
+        
+        return asyncio.run(run())
+
+    @classmethod
+    async def fetch_items(cls, session, save_file=True, filename_prefix="sp_items", currency="EUR",
+                          tradable=False, app_id=730):
+        """
         Get items from Skinport API with proper rate limiting and Brotli support
         
         Args:
+            session (aiohttp.ClientSession): Shared session to download with
             save_file (bool): Save response to file
             filename_prefix (str): Prefix for saved files
             currency (str): Currency code (default USD)
@@ -23,17 +48,16 @@ class SkinportAPI:
             app_id (int): Game app ID (default 730 for CS2)
             
         Returns:
-            dict: API response data or None if error
+            dict: API response data or None if error. When the server reports
+            the data unchanged since the previous call, the cached response is
+            returned and `not_modified` is set.
         """
         logger = setup_logger("skinport_api")
         config = load_config()
+        cls.not_modified = False
         
-        # Rate limiting
-        elapsed = time.time() - cls._last_request_time
-        if elapsed < cls._rate_limit_delay:
-            wait_time = cls._rate_limit_delay - elapsed
-            logger.info(f"Rate limiting: waiting {wait_time:.1f} seconds")
-            time.sleep(wait_time)
+        # Rate limiting (shared token bucket, waits only when out of budget)
+        await get_rate_limiter(cls.rate_limit).acquire_async()
         
         try:
             # Prepare request
@@ -50,31 +74,55 @@ class SkinportAPI:
                 "User-Agent": "Mozilla/5.0 (compatible; SkinportAPI/1.0)"
             }
             
+            # Conditional request against the previous response for this query
+            cache_key = (app_id, currency, tradable)
+            has_cache = cache_key in cls._cached_data
+            etag, last_modified, previous_digest = cls._validators.get(cache_key, (None, None, None))
+            if has_cache:
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+            
             # Make request
-            cls._last_request_time = time.time()
-            response = requests.get(api_url, headers=headers, params=params, timeout=15)
-            response.raise_for_status()
+            async with session.get(api_url, headers=headers, params=params) as response:
+                if response.status == 304 and has_cache:
+                    cls.not_modified = True
+                    logger.info("Skinport data unchanged (HTTP 304), using cached data")
+                    return cls._cached_data[cache_key]
+                response.raise_for_status()
+                content = await response.read()
+            BYTES_DOWNLOADED.inc(len(content), market="skinport")
+            
+            # Same body as last time: skip parsing when the server sends no validators
+            digest = await asyncio.to_thread(lambda: hashlib.sha1(content).hexdigest())
+            cls._validators[cache_key] = (
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                digest
+            )
+            if has_cache and digest == previous_digest:
+                cls.not_modified = True
+                logger.info("Skinport data unchanged (same payload), using cached data")
+                return cls._cached_data[cache_key]
             
-            # Process response
-            data = response.json()
+            # Process response; parsing runs in a thread so the loop keeps serving
+            # timeouts, cancellation and the other markets
+            with timed("parse_skinport"):
+                data = await asyncio.to_thread(json.loads, content)
+            record_rows("skinport_items", len(data))
+            cls._cached_data[cache_key] = data
             
-            # Save to file if requested
+            # Save snapshot in the background if requested
             if save_file:
-                save_folder = config['data']['raw']['skinport_items']
-                os.makedirs(save_folder, exist_ok=True)
-                
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                filename = f"{filename_prefix}_{currency}_{'tradable' if tradable else 'all'}_{timestamp}.json"
-                full_path = os.path.join(save_folder, filename)
-                
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Data saved to {full_path}")
+                get_snapshot_store().write_async(
+                    "skinport", data,
+                    prefix=f"{filename_prefix}_{currency}_{'tradable' if tradable else 'all'}"
+                )
             
             return data
             
-        except requests.exceptions.RequestException as e:
+        except aiohttp.ClientError as e:
             logger.error(f"API request failed: {str(e)}")
         except json.JSONDecodeError as e:
             logger.error(f"Failed to decode JSON response: {str(e)}")
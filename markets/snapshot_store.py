@@ -0,0 +1,128 @@
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.helpers import load_config
+from utils.logger import setup_logger
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class SnapshotStore:
+    """
+    Raw market snapshots as compressed Parquet files.
+
+    Snapshots are partitioned as `<root>/market=<name>/date=<YYYY-MM-DD>/`.
+    Writes go through a queue drained by a single background thread, so the
+    fetch path only pays for enqueuing the parsed records. Reads memory-map
+    the file straight into Arrow and then pandas, without any JSON parsing.
+    """
+
+    def __init__(self, root, compression="zstd"):
+        self.root = Path(root)
+        self.compression = compression
+        self.logger = setup_logger("snapshot_store")
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._drain, name="SnapshotWriter", daemon=True)
+        self._writer.start()
+
+    def path_for(self, market, fetched_at, prefix=None):
+        """Partitioned file path for a snapshot taken at `fetched_at`"""
+        folder = self.root / f"market={market}" / f"date={fetched_at:%Y-%m-%d}"
+        return folder / f"{prefix or market}_{fetched_at:%H-%M-%S-%f}.parquet"
+
+    def write(self, market, data, fetched_at=None, prefix=None):
+        """
+        Write a snapshot synchronously
+
+        Args:
+            market (str): Market name used as partition key
+            data: pd.DataFrame, pyarrow.Table or list of record dicts
+            fetched_at (datetime): Snapshot time (default now)
+            prefix (str): File name prefix (default market name)
+
+        Returns:
+            Path: Written file
+        """
+        fetched_at = fetched_at or datetime.now()
+        if isinstance(data, pd.DataFrame):
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        elif isinstance(data, pa.Table):
+            table = data
+        else:
+            table = pa.Table.from_pylist(list(data))
+
+        path = self.path_for(market, fetched_at, prefix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        tmp_path.replace(path)
+        return path
+
+    def write_async(self, market, data, fetched_at=None, prefix=None):
+        """Queue a snapshot for the background writer and return immediately"""
+        self._queue.put((market, data, fetched_at or datetime.now(), prefix))
+
+    def flush(self):
+        """Block until all queued snapshots are written"""
+        self._queue.join()
+
+    def _drain(self):
+        while True:
+            market, data, fetched_at, prefix = self._queue.get()
+            try:
+                path = self.write(market, data, fetched_at, prefix)
+                self.logger.info(f"Raw {market} snapshot saved to {path}")
+            except Exception as e:
+                self.logger.error(f"Failed to save {market} snapshot: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def list_snapshots(self, market, date=None):
+        """
+        Snapshot files of a market, oldest first
+
+        Args:
+            market (str): Market name
+            date (str): Restrict to one `YYYY-MM-DD` partition
+
+        Returns:
+            list[Path]: Snapshot files
+        """
+        pattern = f"date={date}/*.parquet" if date else "date=*/*.parquet"
+        return sorted(
+            (self.root / f"market={market}").glob(pattern),
+            key=lambda p: (p.parent.name, p.name)
+        )
+
+    def read(self, path, columns=None):
+        """
+        Memory-map a snapshot back into a DataFrame
+
+        Args:
+            path (Path): Snapshot file
+            columns (list): Only load these columns
+
+        Returns:
+            pd.DataFrame: Snapshot contents
+        """
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    def latest(self, market, columns=None):
+        """Most recent snapshot of a market, or None if there is none"""
+        snapshots = self.list_snapshots(market)
+        return self.read(snapshots[-1], columns) if snapshots else None
+
+
+def get_snapshot_store():
+    """Return the process-wide snapshot store rooted at `data.snapshots` in config.yaml"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = load_config()
+            _store = SnapshotStore(config['data'].get('snapshots', "data/snapshots"))
+        return _store
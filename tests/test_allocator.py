@@ -0,0 +1,42 @@
+import numpy as np
+from core.allocator import allocate_units
+
+
+def _units(items):
+    """Flat unit arrays from [(units, price, profit per unit), ...] per item"""
+    unit_item = np.repeat(np.arange(len(items)), [units for units, _, _ in items])
+    unit_price = np.repeat([float(price) for _, price, _ in items], [units for units, _, _ in items])
+    unit_profit = np.repeat([float(profit) for _, _, profit in items], [units for units, _, _ in items])
+    return unit_item, unit_price, unit_profit
+
+
+def test_single_item_prefix_beats_greedy():
+    # The greedy takes the one unit of A and then may not open B; 9 units of B are worth far more
+    unit_item, unit_price, unit_profit = _units([(1, 1, 2.0), (10, 1, 1.5)])
+    taken, _ = allocate_units(unit_item, unit_price, unit_profit, total_budget=9, max_items=1)
+    assert unit_profit[taken].sum() == 13.5
+    assert set(unit_item[taken]) == {1}
+    assert unit_price[taken].sum() <= 9
+
+
+def test_allocation_is_feasible():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n_units = rng.integers(1, 40)
+        unit_item = np.sort(rng.integers(0, 6, n_units))
+        unit_price = np.ones(n_units)
+        for item in np.unique(unit_item):
+            units = unit_item == item
+            unit_price[units] = np.sort(rng.uniform(0.5, 5.0, units.sum()))
+        # Profit is one sell value per item minus the unit price, so it falls along the prefix
+        unit_profit = rng.uniform(0.5, 6.0, 6)[unit_item] - unit_price
+        budget = rng.uniform(1.0, 40.0)
+        max_items = int(rng.integers(1, 4))
+
+        taken, bound = allocate_units(unit_item, unit_price, unit_profit, budget, max_items)
+        assert unit_price[taken].sum() <= budget + 1e-9
+        assert len(np.unique(unit_item[taken])) <= max_items
+        for item in np.unique(unit_item):
+            # Every item is bought as a cheapest-first prefix of its units
+            item_taken = taken[unit_item == item]
+            assert not (np.diff(item_taken.astype(int)) > 0).any()
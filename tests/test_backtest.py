@@ -0,0 +1,37 @@
+import pandas as pd
+from core.backtest import _fill_orders
+
+RISK = {"max_total_investment": 100, "max_items_per_day": 2}
+
+
+def _trades(rows):
+    """Priced picks from (strategy, buy time, name, cost, sell time or None)"""
+    frame = pd.DataFrame(rows, columns=["strategy", "snapshot_time", "name", "cost", "sell_time"])
+    frame["snapshot_time"] = pd.to_datetime(frame["snapshot_time"])
+    frame["sell_time"] = pd.to_datetime(frame["sell_time"])
+    frame["realized"] = frame["sell_time"].notna()
+    return frame
+
+
+def test_capital_is_spent_once_and_released_on_exit():
+    trades = _trades([
+        (0, "2026-01-01 10:00", "a", 80, "2026-01-02 10:00"),
+        (0, "2026-01-01 11:00", "b", 30, "2026-01-02 11:00"),  # Only 20 left
+        (0, "2026-01-02 10:00", "c", 90, "2026-01-03 10:00"),  # "a" sold at this snapshot
+        (0, "2026-01-02 12:00", "a", 10, None),  # 10 left after "c"
+    ])
+    kept = _fill_orders(trades, [RISK])
+    assert kept["name"].tolist() == ["a", "c", "a"]
+
+
+def test_items_per_day_and_open_positions():
+    trades = _trades([
+        (0, "2026-01-01 10:00", "a", 10, None),
+        (0, "2026-01-01 11:00", "a", 10, None),  # Still held, never sold
+        (0, "2026-01-01 12:00", "b", 10, "2026-01-01 13:00"),
+        (0, "2026-01-01 14:00", "c", 10, None),  # Third item that day
+        (0, "2026-01-02 10:00", "c", 10, None),
+        (1, "2026-01-01 10:00", "c", 10, None),  # Other strategy, own limits
+    ])
+    kept = _fill_orders(trades, [RISK, RISK])
+    assert list(zip(kept["strategy"], kept["name"])) == [(0, "a"), (0, "b"), (0, "c"), (1, "c")]
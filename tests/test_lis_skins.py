@@ -0,0 +1,41 @@
+import asyncio
+import json
+import aiohttp
+from aiohttp import web
+from markets.lis_skins.ls_get_items import LisSkinsAPI
+from utils.logger import setup_logger
+
+
+def test_stream_detects_unchanged_export_with_last_update_after_items():
+    # `last_update` comes last, so it is only known once every item has been parsed
+    items = [{"name": f"Item {i}", "price": 1.0 + i, "id": i} for i in range(50)]
+    body = '{"status": "success", "items": ' + json.dumps(items) + ', "last_update": 1700000000}'
+
+    async def export(request):
+        return web.Response(text=body, content_type="application/json")
+
+    async def scenario():
+        app = web.Application()
+        app.add_routes([web.get("/export", export)])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/export"
+        logger = setup_logger("lis_skins_api")
+        config = {"lis_skins": {"chunk_size": 256}}
+        try:
+            async with aiohttp.ClientSession() as session:
+                first = await LisSkinsAPI._fetch_items_stream(session, url, {}, config, logger, False, "test")
+                again = await LisSkinsAPI._fetch_items_stream(
+                    session, url, {}, config, logger, False, "test", has_cache=True
+                )
+        finally:
+            await runner.cleanup()
+        return first, again
+
+    LisSkinsAPI.not_modified = False
+    first, again = asyncio.run(scenario())
+    assert len(first) == 50
+    assert again is first
+    assert LisSkinsAPI.not_modified
@@ -0,0 +1,83 @@
+import asyncio
+from aiohttp import web
+from markets.fetcher import MarketFetcher
+
+
+async def _serve(peers):
+    """Local market server with a fast and a never-answering endpoint"""
+    async def fast(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"status": "success", "items": []})
+
+    async def slow(request):
+        await asyncio.sleep(30)
+        return web.json_response({})
+
+    app = web.Application()
+    app.add_routes([web.get("/fast", fast), web.get("/slow", slow)])
+    runner = web.AppRunner(app, shutdown_timeout=0.1)  # Do not wait for the slow handler
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_slow_market_times_out_while_fast_one_returns():
+    async def scenario():
+        peers = []
+        runner, base_url = await _serve(peers)
+        fetcher = MarketFetcher()
+        cancelled = []
+
+        async def fetch(session, path):
+            try:
+                async with session.get(base_url + path) as response:
+                    return await response.json()
+            except asyncio.CancelledError:
+                cancelled.append(path)
+                raise
+
+        try:
+            results = await fetcher.run({
+                "Slow": (lambda session: fetch(session, "/slow"), 0.5),
+                "Fast": (lambda session: fetch(session, "/fast"), 5),
+            })
+            # A second cycle goes through the pooled keep-alive connection
+            again = await fetcher.run({"Fast": (lambda session: fetch(session, "/fast"), 5)})
+        finally:
+            await fetcher.close()
+            await runner.cleanup()
+        return results, again, cancelled, peers
+
+    results, again, cancelled, peers = asyncio.run(scenario())
+    assert isinstance(results["Slow"], asyncio.TimeoutError)
+    assert cancelled == ["/slow"]
+    assert results["Fast"] == {"status": "success", "items": []}
+    assert again["Fast"] == results["Fast"]
+    assert len(peers) == 2 and len(set(peers)) == 1
+
+
+def test_cancel_stops_the_running_fetch():
+    async def scenario():
+        runner, base_url = await _serve([])
+        fetcher = MarketFetcher()
+
+        async def fetch(session):
+            async with session.get(base_url + "/slow") as response:
+                return await response.json()
+
+        try:
+            run = asyncio.create_task(fetcher.run({"Slow": (fetch, 30)}))
+            await asyncio.sleep(0.2)
+            fetcher.cancel()
+            try:
+                await asyncio.wait_for(run, 5)
+            except asyncio.CancelledError:
+                return True
+            return False
+        finally:
+            await fetcher.close()
+            await runner.cleanup()
+
+    assert asyncio.run(scenario())
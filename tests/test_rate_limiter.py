@@ -0,0 +1,32 @@
+import asyncio
+import json
+from utils import rate_limiter
+from utils.rate_limiter import TokenBucket
+
+
+def test_state_is_saved_at_most_once_per_interval(tmp_path, monkeypatch):
+    state_file = tmp_path / "rate_limits.json"
+    state_file.write_text(json.dumps({"other": {"tokens": 1.0, "updated": 0.0}}))
+    bucket = TokenBucket("market", capacity=100, period=60, state_file=state_file)
+    writes = []
+    save_state = bucket.save_state
+    monkeypatch.setattr(bucket, "save_state", lambda: writes.append(1) or save_state())
+
+    async def fetches():
+        for _ in range(20):
+            await bucket.acquire_async()
+
+    asyncio.run(fetches())
+    assert writes == []  # Loading the state counts as the last save
+
+    bucket._saved -= rate_limiter.SAVE_INTERVAL
+    asyncio.run(fetches())
+    assert len(writes) == 1
+
+    # The final level is written on flush, keeping other buckets in the file
+    bucket.save_state()
+    state = json.loads(state_file.read_text())
+    assert state["other"] == {"tokens": 1.0, "updated": 0.0}
+    assert round(state["market"]["tokens"]) == 60
+    restored = TokenBucket("market", capacity=100, period=60, state_file=state_file)
+    assert round(restored._tokens) == 60
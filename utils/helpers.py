@@ -1,21 +1,80 @@
 import yaml
 import json
 import csv
+import os
+import threading
 from pathlib import Path
 import datetime as datetime
 
+CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
+
+_config_cache = {}  # Resolved path -> (mtime_ns, size, parsed config)
+_config_lock = threading.Lock()
+
 def load_config(path: Path = None) -> dict:
+    """
+    Return the parsed config, re-reading the file only when it changed
+
+    The result is shared by every caller in the process and must be
+    treated as read-only. A cheap stat() per call detects edits, so a
+    changed config.yaml is picked up on the next call.
+    """
     if path is None:
-        path = Path(__file__).parent.parent / "config.yaml"
+        path = CONFIG_PATH
+    path = Path(path).resolve()
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        stat = os.stat(path)
+        with _config_lock:
+            cached = _config_cache.get(path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return cached[2]
+            with open(path, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f)
+            _config_cache[path] = (stat.st_mtime_ns, stat.st_size, config)
+            return config
     except FileNotFoundError:
         raise RuntimeError(f"Config file not found: {path}")
     except Exception as e:
         raise RuntimeError(f"Error loading config: {str(e)}")
     
+def validate_config(config: dict) -> dict:
+    """
+    Check the strategy and risk sections before they are used for trading
+
+    Raises:
+        ValueError: Describing every invalid or missing value
+    """
+    required = {
+        'strategy': ['min_profit_pct', 'max_profit_pct', 'min_quantity'],
+        'risk': ['max_investment_per_item', 'max_total_investment', 'max_items_per_day'],
+    }
+    problems = []
+    for section, keys in required.items():
+        values = (config or {}).get(section)
+        if not isinstance(values, dict):
+            problems.append(f"missing section '{section}'")
+            continue
+        for key in keys:
+            value = values.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"{section}.{key} must be a number, got {value!r}")
+            elif value < 0:
+                problems.append(f"{section}.{key} must not be negative, got {value}")
+
+    if not problems:
+        strategy, risk = config['strategy'], config['risk']
+        if strategy['min_profit_pct'] > strategy['max_profit_pct']:
+            problems.append("strategy.min_profit_pct is above strategy.max_profit_pct")
+        if risk['max_investment_per_item'] > risk['max_total_investment']:
+            problems.append("risk.max_investment_per_item is above risk.max_total_investment")
+        if not isinstance(risk['max_items_per_day'], int):
+            problems.append("risk.max_items_per_day must be a whole number")
+
+    if problems:
+        raise ValueError("Invalid config: " + "; ".join(problems))
+    return config
+
 def ensure_folder_exists(path: Path):
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
@@ -1,28 +1,107 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
+import multiprocessing.util
 import os
+import queue
+import threading
 from utils.helpers import load_config
 
+_loggers = {}  # Name -> configured logger
+_registry_lock = threading.Lock()
+_queue = None
+_listener = None
 
-def setup_logger(name: str, log_level=logging.INFO):
-    config = load_config()
 
-    logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+class _LogRouter(logging.Handler):
+    """Listener-side handler: console for every record plus one file per logger name"""
+
+    def __init__(self, logs_dir, formatter):
+        super().__init__()
+        self.logs_dir = logs_dir
+        self.formatter = formatter
+        self.console = logging.StreamHandler()
+        self.console.setFormatter(formatter)
+        self.files = {}
+
+    def emit(self, record):
+        self.console.handle(record)
+        fh = self.files.get(record.name)
+        if fh is None:
+            fh = logging.FileHandler(os.path.join(self.logs_dir, f"{record.name}.log"))
+            fh.setFormatter(self.formatter)
+            self.files[record.name] = fh
+        fh.handle(record)
 
-    logs_dir = config['data']['reports']
+    def close(self):
+        self.console.close()
+        for fh in self.files.values():
+            fh.close()
+        super().close()
+
+
+def _start_listener():
+    """Start the single background thread that does all log I/O"""
+    global _queue, _listener
+    logs_dir = load_config()['data']['reports']
     os.makedirs(logs_dir, exist_ok=True)
 
     formatter = logging.Formatter("[{levelname}] {asctime} {name}: {message}", style="{")
+    _queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue, _LogRouter(logs_dir, formatter))
+    _listener.start()
+    if multiprocessing.parent_process() is not None:
+        # Worker processes leave through os._exit, which skips atexit
+        multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=10)
+
 
+def shutdown_logging():
+    """Flush queued records and close all log files"""
+    global _listener
+    with _registry_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
 
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
 
-    log_file = os.path.join(logs_dir, f"{name}.log")
-    fh = logging.FileHandler(log_file)
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
+def _reset_after_fork():
+    # The listener thread does not survive fork; children start their own on first use
+    global _queue, _listener, _registry_lock
+    _registry_lock = threading.Lock()
+    for logger in _loggers.values():
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+    _loggers.clear()
+    _queue = None
+    _listener = None
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def setup_logger(name: str, log_level=logging.INFO):
+    """
+    Return the process-wide logger `name`, configuring it on first use
+
+    Records are handed to a queue and written to the console and to
+    `<data.reports>/<name>.log` by a single listener thread, so callers
+    never block on log I/O. Repeated calls return the same logger without
+    adding handlers; `log_level` only applies to the first call.
+    """
+    with _registry_lock:
+        logger = _loggers.get(name)
+        if logger is not None:
+            return logger
 
-    return logger
+        if _listener is None:
+            _start_listener()
 
+        logger = logging.getLogger(name)
+        logger.setLevel(log_level)
+        logger.addHandler(logging.handlers.QueueHandler(_queue))
+        _loggers[name] = logger
+        return logger
@@ -0,0 +1,190 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Bucket upper bounds; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ROW_BUCKETS = (10, 100, 1000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000)
+AGE_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1800, 3600, 21600, 86400)
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in Prometheus format"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    "labels": dict(zip(self.labels, key)),
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], _cumulative(s["counts"]))),
+                    "sum": s["sum"],
+                    "count": s["count"],
+                }
+                for key, s in self._series.items()
+            ]
+
+    def render(self):
+        lines = []
+        for series in self.snapshot():
+            for bound, count in series["buckets"].items():
+                lines.append(f"{self.name}_bucket{_labels(series['labels'], le=bound)} {count}")
+            lines.append(f"{self.name}_sum{_labels(series['labels'])} {series['sum']}")
+            lines.append(f"{self.name}_count{_labels(series['labels'])} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "value": v} for k, v in self._values.items()]
+
+    def render(self):
+        return [f"{self.name}{_labels(s['labels'])} {s['value']}" for s in self.snapshot()]
+
+
+def _cumulative(counts):
+    total, result = 0, []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _labels(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+
+STAGE_SECONDS = Histogram(
+    "skins_stage_seconds", "Latency of pipeline stages", ("stage",), LATENCY_BUCKETS
+)
+STAGE_ROWS = Histogram(
+    "skins_stage_rows", "Rows produced by pipeline stages", ("stage",), ROW_BUCKETS
+)
+BYTES_DOWNLOADED = Counter(
+    "skins_downloaded_bytes_total", "Response bytes downloaded per market", ("market",)
+)
+RATE_LIMIT_WAIT = Histogram(
+    "skins_rate_limit_wait_seconds", "Time spent waiting for rate limit budget", ("endpoint",), LATENCY_BUCKETS
+)
+DATA_AGE = Histogram(
+    "skins_data_age_seconds", "Age of market prices when a report is produced", ("market",), AGE_BUCKETS
+)
+METRICS = [STAGE_SECONDS, STAGE_ROWS, BYTES_DOWNLOADED, RATE_LIMIT_WAIT, DATA_AGE]
+
+
+@contextmanager
+def timed(stage):
+    """Record the duration of the wrapped block as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_rows(stage, rows):
+    """Record how many rows a pipeline stage produced"""
+    STAGE_ROWS.observe(rows, stage=stage)
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_dict():
+    """All metrics as plain JSON-serialisable data"""
+    return {
+        metric.name: {"type": metric.kind, "help": metric.help_text, "series": metric.snapshot()}
+        for metric in METRICS
+    }
+
+
+def dump_json(path):
+    """Atomically write all metrics as JSON to `path`"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": time.time(), "metrics": metrics_dict()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics_dict()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host="127.0.0.1", port=9108):
+    """
+    Serve /metrics (Prometheus) and /metrics.json from a daemon thread
+
+    Returns:
+        ThreadingHTTPServer: The running server, call `shutdown()` to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    return server
@@ -0,0 +1,196 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from utils.helpers import load_config
+from utils.logger import setup_logger
+from utils.metrics import RATE_LIMIT_WAIT
+
+_registry = {}
+_registry_lock = threading.Lock()
+_state_lock = threading.RLock()  # Held again by _read_state_file during a save
+_state_files = {}  # State file path -> saved state of every bucket in it, read once
+SAVE_INTERVAL = 30.0  # Seconds between writes of a persisted bucket
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by threads and asyncio tasks.
+
+    `capacity` requests are allowed per `period` seconds, refilled
+    continuously. Callers reserve a token under a lock and are told how long
+    to wait for it, so concurrent callers queue up behind each other instead
+    of racing on a shared timestamp. With `state_file` set, the bucket level
+    is restored once on creation and written back at most every
+    SAVE_INTERVAL seconds, plus once at exit by `flush_rate_limits`.
+    """
+
+    def __init__(self, name, capacity, period, state_file=None):
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = self.capacity / float(period)  # Tokens per second
+        self.state_file = Path(state_file) if state_file else None
+        self.logger = setup_logger("rate_limiter")
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._dirty = False
+        self._saved = 0.0  # When the level was last written
+        self._load_state()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, tokens=1):
+        """Seconds until `tokens` are available, without reserving them"""
+        with self._lock:
+            self._refill(time.time())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def next_available(self, tokens=1):
+        """Wall-clock time at which `tokens` will be available"""
+        return time.time() + self.delay(tokens)
+
+    def _take(self, tokens):
+        """Reserve `tokens`; returns (seconds to wait, whether a save is due)"""
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+            save = self._mark_dirty(now)
+        RATE_LIMIT_WAIT.observe(wait, endpoint=self.name)
+        if wait > 0:
+            self.logger.info(f"{self.name}: waiting {wait:.1f}s for rate limit budget")
+        return wait, save
+
+    def reserve(self, tokens=1):
+        """
+        Take `tokens` from the bucket, going into debt if needed
+
+        Returns:
+            float: Seconds the caller must wait before using the tokens
+        """
+        wait, save = self._take(tokens)
+        if save:
+            self.save_state()
+        return wait
+
+    def refund(self, tokens=1):
+        """Give back tokens that were reserved but not used"""
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+            self._tokens = min(self.capacity, self._tokens + tokens)
+            self._mark_dirty(now)
+
+    def acquire(self, tokens=1):
+        """Block the calling thread until `tokens` are available"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """Wait on the event loop until `tokens` are available"""
+        wait, save = self._take(tokens)
+        if save:
+            # The file write runs in a worker thread, not on the event loop
+            await asyncio.to_thread(self.save_state)
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.refund(tokens)
+            raise
+        return wait
+
+    def _mark_dirty(self, now):
+        """Flag the level as changed; True if a throttled save is due. Call under the lock"""
+        self._dirty = self.state_file is not None
+        return self._dirty and now - self._saved >= SAVE_INTERVAL
+
+    def _load_state(self):
+        if self.state_file is None:
+            return
+        state = _read_state_file(self.state_file, self.logger).get(self.name)
+        if state:
+            self._tokens = min(self.capacity, float(state["tokens"]))
+            self._updated = float(state["updated"])
+            self._refill(time.time())
+        self._saved = time.time()
+
+    def save_state(self):
+        """Write the bucket level to `state_file` if it changed since the last write"""
+        with self._lock:
+            if not self._dirty:
+                return
+            level = {"tokens": self._tokens, "updated": self._updated}
+            self._dirty = False
+            self._saved = time.time()
+        with _state_lock:
+            state = _read_state_file(self.state_file, self.logger)
+            state[self.name] = level
+            try:
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.state_file.with_suffix(".tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_file, self.state_file)
+            except OSError as e:
+                self.logger.warning(f"Could not save rate limit state: {str(e)}")
+
+
+def _read_state_file(path, logger):
+    """Saved state of all buckets in `path`, read from disk only the first time"""
+    with _state_lock:
+        state = _state_files.get(path)
+        if state is None:
+            state = _state_files[path] = {}
+            if path.exists():
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        state.update(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read rate limit state: {str(e)}")
+        return state
+
+
+def flush_rate_limits():
+    """Write the level of every persisted bucket that changed since its last save"""
+    with _registry_lock:
+        limiters = list(_registry.values())
+    for limiter in limiters:
+        if limiter.state_file is not None:
+            limiter.save_state()
+
+
+def get_rate_limiter(name):
+    """
+    Return the process-wide limiter for an endpoint from `rate_limits` in config.yaml
+
+    Args:
+        name (str): Endpoint key under `rate_limits.endpoints`
+
+    Returns:
+        TokenBucket: The shared limiter for that endpoint
+    """
+    with _registry_lock:
+        limiter = _registry.get(name)
+        if limiter is None:
+            settings = load_config().get("rate_limits", {})
+            endpoint = settings.get("endpoints", {}).get(name)
+            if endpoint is None:
+                raise RuntimeError(f"No rate limit configured for endpoint: {name}")
+            state_file = settings.get("state_file") if endpoint.get("persist") else None
+            limiter = _registry[name] = TokenBucket(
+                name, endpoint["requests"], endpoint["period"], state_file
+            )
+        return limiter
+
+
+atexit.register(flush_rate_limits)